@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from chaos_game import ChaosGame
+from fern import Fern
+from raster import Histogram, fit_resolution
+from variations import EXTENT, transform_chunks
+
+# Keys every job may have, with their default values
+DEFAULTS = {
+    "steps": 10 ** 6,
+    "seed": None,
+    "resolution": 1024,
+    "color": False,
+    "cmap": "jet",
+}
+
+
+def load_manifest(path):
+    """Reads the render jobs of a JSON or TOML manifest.
+
+    The manifest has a list of jobs under "jobs". Every job has a "kind",
+    which is "ngon", "fern" or "variations", and an "output" path, relative to
+    the manifest. The other keys are described in render_job.
+
+    Parameters
+    ----------
+    path : str
+        Path of the manifest, ending in .json or .toml
+
+    Returns
+    -------
+    list of dict
+        The jobs, with defaults filled in and absolute output paths
+    """
+    if path.endswith(".toml"):
+        # tomllib is only in the standard library from Python 3.11
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError(
+                    "TOML manifests need Python 3.11 or the tomli package"
+                ) from None
+
+        with open(path, "rb") as file:
+            manifest = tomllib.load(file)
+    else:
+        with open(path) as file:
+            manifest = json.load(file)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    jobs = []
+
+    for i, job in enumerate(manifest.get("jobs", [])):
+        if job.get("kind") not in ("ngon", "fern", "variations"):
+            raise ValueError(f"job {i}: kind must be ngon, fern or variations")
+        if "output" not in job:
+            raise ValueError(f"job {i}: an output path is needed")
+
+        job = {**DEFAULTS, **job}
+        job["output"] = os.path.join(directory, job["output"])
+        job.setdefault("name", os.path.basename(job["output"]))
+        jobs.append(job)
+
+    return jobs
+
+
+def _source(job, rng):
+    """Returns the object whose points are rendered, for an ngon or a fern."""
+    if job.get("source", job["kind"]) == "fern":
+        return Fern(rng=rng)
+
+    return ChaosGame(int(job["n"]), float(job["r"]), rng=rng)
+
+
+def render_job(job):
+    """Renders one job to a PNG file.
+
+    Parameters
+    ----------
+    job : dict
+        The job, with the keys
+        kind : "ngon", "fern" or "variations"
+        output : path of the PNG file
+        n, r : number of sides and ratio, for an ngon
+        variations, coefficients : names and weights of the variations, for
+            variations
+        source : "ngon" or "fern", the points transformed by variations
+        steps : number of points, by default 10**6
+        seed : seed of the random numbers, by default a random seed
+        resolution : width of the image in pixels, by default 1024
+        color : true to color the points by their color values with cmap,
+            or a single color, by default black, or green for a fern
+        cmap : colormap of the color values, by default "jet"
+        extent : area drawn, by default the extent of the figure, or
+            variations.EXTENT for variations
+
+    Returns
+    -------
+    float
+        The number of seconds taken
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(job["seed"])
+    color = job["color"]
+
+    figure = _source(job, rng)
+    chunks = figure.iter_chunks(job["steps"])
+
+    if job["kind"] == "variations":
+        chunks = transform_chunks(
+            chunks, figure.extent, job["coefficients"], job["variations"]
+        )
+        extent = tuple(job.get("extent", EXTENT))
+    else:
+        extent = tuple(job.get("extent", figure.extent))
+
+    histogram = Histogram(extent, fit_resolution(extent, job["resolution"]))
+    for points, values in chunks:
+        histogram.add(points, values if color is True else None)
+
+    os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+    if color is True:
+        histogram.save_png(job["output"], cmap=job["cmap"])
+    else:
+        default = "green" if job["kind"] == "fern" else "black"
+        histogram.save_png(job["output"], color=color or default)
+
+    return time.perf_counter() - start
+
+
+def up_to_date(job, manifest):
+    """Returns True if the output of a job is newer than the manifest."""
+    output = job["output"]
+    if not os.path.exists(output):
+        return False
+
+    return os.path.getmtime(output) >= os.path.getmtime(manifest)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Renders the jobs of a JSON or TOML manifest to PNG files."
+    )
+    parser.add_argument("manifest", help="path of the manifest")
+    parser.add_argument(
+        "--workers", type=int, help="number of worker processes, by default all CPUs"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="render jobs that are up to date"
+    )
+    args = parser.parse_args(argv)
+
+    jobs = load_manifest(args.manifest)
+    results = [("up to date", 0.0)] * len(jobs)
+    pending = [
+        i
+        for i, job in enumerate(jobs)
+        if args.force or not up_to_date(job, args.manifest)
+    ]
+
+    start = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(args.workers) as pool:
+            futures = {pool.submit(render_job, jobs[i]): i for i in pending}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = ("rendered", future.result())
+                except Exception as error:
+                    results[futures[future]] = (f"failed: {error}", 0.0)
+
+    width = max(len(job["name"]) for job in jobs + [{"name": "total"}])
+    for job, (status, seconds) in zip(jobs, results):
+        print(f"{job['name']:<{width}}  {seconds:8.2f} s  {status}")
+    print(f"{'total':<{width}}  {time.perf_counter() - start:8.2f} s")
+
+    return 1 if any(status.startswith("failed") for status, _ in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
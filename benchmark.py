@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from chaos_game import ChaosGame
+from fern import Fern
+from raster import pyplot
+from variations import Variations
+
+# Point counts timed by default, from 10**4 to 10**7
+COUNTS = [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+
+
+def _iterate(n):
+    game = ChaosGame(4, 1 / 3, rng=0)
+    return lambda: game.iterate(n)
+
+
+def _compute_color(n):
+    game = ChaosGame(4, 1 / 3, rng=0)
+    game.iterate(n, discard=0)
+    corner_list, start = game.corner_list[None], np.zeros(shape=(1, 1))
+    return lambda: game._compute_color(corner_list, start)
+
+
+def _fern(n):
+    fern = Fern(rng=0)
+    return lambda: fern.iterate(n)
+
+
+def _variation(name):
+    def setup(n):
+        x, y = np.random.default_rng(0).normal(size=(2, n))
+        # A new object every time, so the cached polar coordinates are timed
+        return lambda: Variations(x, y).collection[name]()
+
+    return setup
+
+
+def _savepng(n):
+    game = ChaosGame(4, 1 / 3, rng=0)
+    game.iterate(n)
+
+    def run():
+        game.savepng("benchmark", color=True)
+        pyplot().close("all")
+
+    return run
+
+
+# Every case takes a number of points and returns the function to be timed
+CASES = {
+    "ChaosGame.iterate": _iterate,
+    "ChaosGame._compute_color": _compute_color,
+    "Fern.iterate": _fern,
+    "Variations.linear": _variation("linear"),
+    "Variations.swirl": _variation("swirl"),
+    "Variations.handkerchief": _variation("handkerchief"),
+    "Variations.disc": _variation("disc"),
+    "ChaosGame.savepng": _savepng,
+}
+
+
+def measure(func, points, repeat=3):
+    """Times a function and measures its peak memory.
+
+    The time is the best of repeat runs. The memory is measured in a separate
+    run, since tracing the allocations slows the function down.
+
+    Parameters
+    ----------
+    func : callable
+        The function to be measured, called without arguments
+    points : int
+        Number of points handled by one call
+    repeat : int, optional
+        Number of timed runs, by default 3
+
+    Returns
+    -------
+    dict
+        The time in seconds, the points per second and the peak memory in
+        bytes allocated by one call
+    """
+    seconds = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": seconds, "points_per_sec": points / seconds, "peak_bytes": peak}
+
+
+def run(counts=COUNTS, cases=None, repeat=3):
+    """Measures every case for every number of points.
+
+    savepng writes to figures/, so all cases are run in a temporary directory.
+
+    Parameters
+    ----------
+    counts : list of int, optional
+        Numbers of points, by default 10**4 to 10**7
+    cases : list of str, optional
+        Names of the cases in CASES, by default all of them
+    repeat : int, optional
+        Number of timed runs of each case, by default 3
+
+    Returns
+    -------
+    list of dict
+        One result for each case and number of points
+    """
+    results = []
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.mkdir(os.path.join(directory, "figures"))
+        os.chdir(directory)
+        try:
+            for name in CASES if cases is None else cases:
+                for points in counts:
+                    result = measure(CASES[name](points), points, repeat)
+                    results.append({"case": name, "points": points, **result})
+        finally:
+            os.chdir(cwd)
+
+    return results
+
+
+def compare(results, baseline, threshold=0.25):
+    """Finds the results that are worse than the baseline.
+
+    A result has regressed if its points per second is more than threshold
+    below the baseline, or its peak memory is more than threshold above it.
+    Results without a baseline are skipped.
+
+    Parameters
+    ----------
+    results : list of dict
+        Results of run
+    baseline : list of dict
+        Earlier results of run
+    threshold : float, optional
+        Allowed relative change, by default 0.25
+
+    Returns
+    -------
+    list of str
+        A description of every regression
+    """
+    reference = {(b["case"], b["points"]): b for b in baseline}
+    regressions = []
+
+    for result in results:
+        base = reference.get((result["case"], result["points"]))
+        if base is None:
+            continue
+
+        label = f"{result['case']} with {result['points']} points"
+        if result["points_per_sec"] < (1 - threshold) * base["points_per_sec"]:
+            regressions.append(
+                f"{label}: {result['points_per_sec']:.3g} points/s, "
+                f"baseline {base['points_per_sec']:.3g}"
+            )
+        if result["peak_bytes"] > (1 + threshold) * base["peak_bytes"]:
+            regressions.append(
+                f"{label}: {result['peak_bytes']} bytes, "
+                f"baseline {base['peak_bytes']}"
+            )
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times the chaos game.")
+    parser.add_argument(
+        "--counts", type=int, nargs="+", default=COUNTS, help="numbers of points"
+    )
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), help="cases")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON file of earlier results")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed relative change"
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.counts, args.cases, args.repeat)
+
+    for result in results:
+        print(
+            f"{result['case']:<26}{result['points']:>10} points"
+            f"{result['points_per_sec']:>12.3g} points/s"
+            f"{result['peak_bytes'] / 2 ** 20:>10.1f} MiB"
+        )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print("regression:", regression)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
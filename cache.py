@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+
+from chaos_game import ChaosGame
+from fern import Fern
+from raster import Histogram, fit_resolution
+from variations import EXTENT, transform_chunks
+
+
+class RenderCache:
+    """A cache of rendered histograms on disk, with least recently used eviction.
+
+    Every entry is a checkpoint of a ChaosGame or Fern, holding the histogram
+    and the state to continue from, next to a JSON file with the parameters
+    and the number of points generated. Entries are named by a hash of the
+    render parameters, so the same parameters always give the same entry. A
+    request for at most as many points as an entry holds returns its
+    histogram directly, and a request for more points continues from the
+    checkpoint and adds only the missing points.
+
+    When the files take more than max_bytes, the entries that were used the
+    longest time ago are removed.
+
+    Attributes
+    ----------
+    hits : int
+        Number of requests answered from the cache alone
+    ----------
+    directory : str
+        Directory of the cache files, created if needed
+    max_bytes : int, optional
+        Largest total size of the cache files, by default 1 GiB
+    """
+
+    def __init__(self, directory, max_bytes=2 ** 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(params):
+        """Returns the hash of a dictionary of render parameters.
+
+        Parameters
+        ----------
+        params : dict
+            Parameters that are JSON serializable
+
+        Returns
+        -------
+        str
+            Hexadecimal SHA-256 of the parameters
+        """
+        text = json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def render(
+        self,
+        kind,
+        steps,
+        seed=0,
+        resolution=1024,
+        extent=None,
+        n=None,
+        r=None,
+        variations=None,
+        coefficients=None,
+        chunk_size=2 ** 20,
+    ):
+        """Returns the histogram of a render, from the cache where possible.
+
+        Parameters
+        ----------
+        kind : str
+            "ngon" or "fern"
+        steps : int
+            Least number of points in the histogram
+        seed : int, optional
+            Seed of the random numbers, by default 0
+        resolution : int, optional
+            Width of the histogram in pixels, by default 1024
+        extent : tuple of float, optional
+            The area covered, by default the extent of the figure, or
+            variations.EXTENT with variations
+        n, r : int and float, optional
+            Number of sides and ratio of an ngon
+        variations : List of str, optional
+            Names of variations that transform the points, by default none
+        coefficients : List of float, optional
+            The weight given to each variation
+        chunk_size : int, optional
+            Number of points generated at a time, by default 2**20
+
+        Returns
+        -------
+        Histogram
+            The histogram, which holds at least steps points
+        """
+        if kind not in ("ngon", "fern"):
+            raise ValueError('kind must be "ngon" or "fern"')
+
+        params = dict(
+            kind=kind,
+            seed=int(seed),
+            resolution=int(resolution),
+            extent=None if extent is None else [float(x) for x in extent],
+            n=None if n is None else int(n),
+            r=None if r is None else float(r),
+            variations=None if variations is None else list(variations),
+            coefficients=None,
+        )
+        if coefficients is not None:
+            params["coefficients"] = [float(c) for c in coefficients]
+        base = os.path.join(self.directory, self.key(params))
+        cls = ChaosGame if kind == "ngon" else Fern
+
+        if os.path.exists(base + ".npz") and os.path.exists(base + ".json"):
+            with open(base + ".json") as file:
+                samples = json.load(file)["samples"]
+            figure = cls.load(base + ".npz")
+
+            # Mark the entry as recently used
+            os.utime(base + ".npz")
+            os.utime(base + ".json")
+
+            if samples >= steps:
+                self.hits += 1
+                return figure.histogram
+        else:
+            figure = Fern(rng=seed) if kind == "fern" else ChaosGame(n, r, rng=seed)
+            samples = 0
+
+        if figure.histogram is None:
+            if extent is None:
+                extent = figure.extent if variations is None else EXTENT
+            figure.histogram = Histogram(extent, fit_resolution(extent, resolution))
+
+        chunks = figure.iter_chunks(steps - samples, chunk_size, resume=samples > 0)
+        if variations is not None:
+            chunks = transform_chunks(chunks, figure.extent, coefficients, variations)
+
+        for points, values in chunks:
+            figure.histogram.add(points, values)
+
+        figure.save(base + ".npz")
+        with open(base + ".json", "w") as file:
+            json.dump({"params": params, "samples": steps}, file)
+
+        self._evict(keep=os.path.basename(base))
+
+        return figure.histogram
+
+    def _evict(self, keep=None):
+        """Removes the least recently used entries until the cache fits.
+
+        Parameters
+        ----------
+        keep : str, optional
+            Name of an entry that is never removed, by default None
+        """
+        entries = {}
+        for name in os.listdir(self.directory):
+            key, suffix = os.path.splitext(name)
+            if suffix in (".npz", ".json"):
+                stat = os.stat(os.path.join(self.directory, name))
+                used, size = entries.get(key, (0.0, 0))
+                entries[key] = (max(used, stat.st_mtime), size + stat.st_size)
+
+        total = sum(size for _, size in entries.values())
+        for used, size, key in sorted((u, s, k) for k, (u, s) in entries.items()):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+
+            for suffix in (".npz", ".json"):
+                path = os.path.join(self.directory, key + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= size
@@ -1,5 +1,139 @@
 import numpy as np
-import matplotlib.pyplot as plt
+import checkpoint
+from ifs import IFS
+from profiling import progress, stage
+from raster import Histogram, fit_resolution, plot_points, pyplot
+from rules import markov_chain, transition_matrix
+
+
+def linear_recurrence(start, targets, r):
+    """Evaluates p[i] = r * p[i - 1] + (1 - r) * targets[i] without a loop.
+
+    The sequence is split into blocks that are short enough for r**-i not to
+    overflow. Inside a block the recurrence is solved with a scaled cumulative
+    sum, and the state carried between blocks is added back afterwards.
+
+    Parameters
+    ----------
+    start : ndarray (..., d)
+        The value of p[-1]
+    targets : ndarray (..., steps, d)
+        The points that each step contracts towards
+    r : float
+        Ratio between two points
+
+    Returns
+    -------
+    points : ndarray (..., steps, d)
+        The generated sequence
+    """
+    targets = np.asarray(targets, dtype=float)
+    *lead, steps, d = targets.shape
+    start = np.broadcast_to(np.asarray(start, dtype=float), (*lead, d))
+
+    if steps == 0:
+        return np.empty_like(targets)
+
+    # Largest block for which r**-block stays below 1e150
+    block = min(steps, max(1, int(150 * np.log(10) / -np.log(r))))
+    blocks = -(-steps // block)
+
+    padded = np.zeros(shape=(*lead, blocks * block, d))
+    padded[..., :steps, :] = targets
+    work = padded.reshape(*lead, blocks, block, d)
+
+    j = np.arange(block)
+    work *= np.power(r, -j)[:, None]
+    np.cumsum(work, axis=-2, out=work)
+    work *= ((1 - r) * np.power(r, j))[:, None]
+
+    # State entering each block: carry[b] = R**b * start + sum R**m * ends[b-1-m]
+    ends = work[..., -1, :]
+    big_r = r ** block
+    carry = np.empty(shape=(*lead, blocks, d))
+    carry[..., 0, :] = start
+    carry[..., 1:, :] = ends[..., :-1, :]
+    carry[..., 1:, :] += (
+        np.power(big_r, np.arange(1, blocks))[:, None] * start[..., None, :]
+    )
+
+    power = big_r
+    for m in range(1, blocks - 1):
+        if power < np.finfo(float).tiny:
+            break
+        carry[..., m + 1 :, :] += power * ends[..., : blocks - m - 1, :]
+        power *= big_r
+
+    work += np.power(r, j + 1)[:, None] * carry[..., :, None, :]
+
+    return padded[..., :steps, :]
+
+
+def color_gradient(corner_list, palette=None, start=0):
+    """Computes the color gradient color[i] = (color[i - 1] + c_i) / 2.
+
+    Each point gets the mean of the color of the previous point and the color
+    c_i of its corner, so that points close to each other get similar colors.
+
+    Parameters
+    ----------
+    corner_list : ndarray (..., m) of int
+        The picked corner indexes, with one row per walker
+    palette : ndarray (n, channels), optional
+        Color of each corner, for example RGB values. By default c_i is the
+        corner index itself, which gives a scalar gradient.
+    start : float or ndarray (channels, ), optional
+        The color before the first point, color[-1], by default 0
+
+    Returns
+    -------
+    color : ndarray (..., m) or (..., m, channels)
+        Color of each point
+    """
+    corner_list = np.asarray(corner_list)
+
+    if palette is None:
+        return linear_recurrence(start, corner_list[..., None], 1 / 2)[..., 0]
+
+    return linear_recurrence(start, np.asarray(palette)[corner_list], 1 / 2)
+
+
+def fill_recurrence(out, start, corner_list, table, r, block=2 ** 20):
+    """Evaluates linear_recurrence into out, one block of steps at a time.
+
+    Only one block of the targets is held as float64 at a time, so out can
+    have a smaller dtype than float64 without a full size float64 copy. The
+    state carried between blocks keeps full precision.
+
+    Parameters
+    ----------
+    out : ndarray (..., m, d)
+        Array the sequence is written into
+    start : ndarray (..., d)
+        The value before the first step
+    corner_list : ndarray (..., m) of int
+        The picked corner indexes
+    table : ndarray (n, d)
+        The target of each corner index
+    r : float
+        Ratio between two points
+
+    Returns
+    -------
+    state : ndarray (..., d)
+        The last value of the sequence, in float64
+    """
+    walkers = max(1, int(np.prod(corner_list.shape[:-1])))
+    steps = max(1, block // walkers)
+    state = np.asarray(start, dtype=float)
+
+    for lo in range(0, corner_list.shape[-1], steps):
+        values = linear_recurrence(state, table[corner_list[..., lo : lo + steps]], r)
+        out[..., lo : lo + steps, :] = values
+        state = values[..., -1, :]
+        progress(walkers * min(lo + steps, corner_list.shape[-1]), corner_list.size)
+
+    return state
 
 
 class ChaosGame:
@@ -15,18 +149,42 @@ class ChaosGame:
             Coordinates for the random starting point
         corners : ndarray (n, 2) of int
             Coordinates for the ngon corners
-        corner_list : ndarray (dicard:n, )
+        corner_list : ndarray (dicard:n, ) of uint8 or uint16
             List of the randomly picked corner indexes
-        points : ndarray (discard:n, 2)
+        points : ndarray (discard:n, 2), or None
             Coordinates for the randomly picked points
+        last_point : ndarray (walkers, 2), or None
+            Current point of every walker, where the next iteration continues
+        last_color : ndarray (walkers, ), or None
+            Current color gradient value of every walker
+        last_corner : ndarray (walkers, ), or None
+            Last picked corner of every walker, only kept with a rule
+        transition : ndarray (n, n), or None
+            Probability of picking corner j after corner i, in row i, or None
+            if every corner is equally likely
+        histogram : Histogram, or None
+            The points binned so far by accumulate
+        viewport : tuple of float, or None
+            The area of the points generated by zoom, which plot and write_png
+            draw instead of the extent, or None after other iterations
         ----------
         n : int
             Number of sides
         r : float
             Ratio between two points
+        dtype : dtype, optional
+            Type of the points and colors, for example float32 to halve
+            their memory, by default float64
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default a new
+            PCG64 generator
+        rule : array_like (n, n) or rule object, optional
+            Restricts the corner picked after each corner, either as a
+            transition matrix of weights or as an object with a matrix(n)
+            method, such as rules.NO_REPEAT, by default no restriction
     """
 
-    def __init__(self, n, r):
+    def __init__(self, n, r, dtype=np.float64, rng=None, rule=None):
         assert isinstance(n, int), "n must be of type int"
         assert isinstance(r, float), "r must be of type float"
 
@@ -39,9 +197,16 @@ class ChaosGame:
 
         self.n = n
         self.r = r
+        self.dtype = np.dtype(dtype)
+        self.corner_dtype = np.min_scalar_type(n - 1)
+        self.rng = np.random.default_rng(rng)
+        self.transition = None if rule is None else transition_matrix(rule, n)
 
         self._generate_ngon()
         self.st_point = self._starting_point()
+        self.last_point = self.last_color = self.last_corner = None
+        self.points = self.colors = self.corner_list = None
+        self.histogram = self.viewport = None
 
     def _generate_ngon(self):
         """Generates the corners of a ngon, for a given number of sides."""
@@ -59,76 +224,397 @@ class ChaosGame:
 
     def plot_ngon(self):
         """Plots the ngon."""
+        plt = pyplot()
         plt.scatter(*zip(*self.corners))
 
         plt.axis("equal")
         plt.show()
 
-    def _starting_point(self):
+    def _starting_point(self, size=None, rng=None):
         """Returns a random starting point inside the ngon.
 
         Finds a random point inside the ngon by taking the coordinates 
         of the corners and multiplying them with random weights.
 
+        Parameters
+        ----------
+        size : int, optional
+            Number of starting points, by default a single point
+        rng : Generator, optional
+            Random number generator, by default the one of the game
+
         Returns
         -------
-        point : ndarray (2, )
+        point : ndarray (2, ) or (size, 2)
             Random starting point
         """
-        w = np.zeros(self.n)
-
-        for i in range(w.size):
-            w[i] = np.random.random()
+        rng = self.rng if rng is None else rng
+        w = rng.random(self.n if size is None else (size, self.n))
 
         # Divide all weights by the sum of the weights so that they sum to one
-        w = w / np.sum(w)
+        w = w / np.sum(w, axis=-1, keepdims=True)
+
+        return w @ self.corners
+
+    def _pick_corners(self, shape, rng, previous=None):
+        """Returns randomly picked corners, following the rule if there is one.
+
+        Parameters
+        ----------
+        shape : tuple of int
+            Shape of the corners, with the steps of each walker last
+        rng : Generator
+            Random number generator
+        previous : ndarray, optional
+            Corner picked before the first step of each walker, by default
+            a random corner
+
+        Returns
+        -------
+        ndarray of corner_dtype
+            The picked corners
+        """
+        if self.transition is None:
+            return rng.integers(self.n, size=shape, dtype=self.corner_dtype)
+
+        if previous is None:
+            previous = rng.integers(self.n, size=shape[:-1])
 
-        point = np.zeros(2)
+        return markov_chain(
+            self.transition, previous, shape[-1], rng, dtype=self.corner_dtype
+        )
 
-        for i, c in enumerate(self.corners):
-            point[0] = point[0] + c[0] * w[i]
-            point[1] = point[1] + c[1] * w[i]
+    def _require_uniform(self):
+        """Raises ValueError if the game has a rule for picking corners."""
+        if self.transition is not None:
+            raise ValueError("only a game without a corner rule is an IFS")
 
-        return point
+    def burn_in(self, resolution=1024, tolerance=0.5):
+        """Returns the number of first points to discard for a given accuracy.
 
-    def iterate(self, steps, discard=5):
+        The starting point is inside the ngon, so it is at most the size of
+        the ngon away from the figure, and every step shrinks that distance
+        by r. After d steps a point is within r**d times the size.
+
+        Parameters
+        ----------
+        resolution : int, optional
+            Width in pixels of the image the points are drawn in, by default
+            1024
+        tolerance : float, optional
+            Largest distance from the figure allowed, in pixels, by default
+            0.5
+
+        Returns
+        -------
+        int
+            The number of points to discard
+        """
+        xmin, xmax, ymin, ymax = self.extent
+        size = np.hypot(xmax - xmin, ymax - ymin)
+        distance = tolerance * (xmax - xmin) / resolution
+
+        return max(0, int(np.ceil(np.log(distance / size) / np.log(self.r))))
+
+    def iterate(self, steps, discard=5, walkers=1, rng=None, append=False):
         """Generates points by picking a corner randomly.
 
-        Generated the first point based on the starting point. Iterates step
-        number of times, and discards the first generated points.
+        Draws all the corners at once and evaluates the recurrence
+        p[i] = r * p[i - 1] + (1 - r) * corners[k_i] with array operations,
+        starting from the starting point. Discards the first generated points.
+
+        With more than one walker, every walker starts from its own random
+        starting point, discards its own first points, and all walkers are
+        advanced together. The points of each walker are stored one after
+        the other.
 
         Parameters
         ----------
         steps : int
             Number of iterations / points to be generated
+        discard : int or None, optional
+            Number of first points to be discarded, or None to use burn_in,
+            by default 5
+        walkers : int, optional
+            Number of independent walkers, each doing steps / walkers
+            iterations, by default 1
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the game
+        append : bool, optional
+            Continues every walker from its last point and color, and appends
+            the new points after the ones already generated instead of
+            replacing them. Nothing is discarded, and the number of walkers
+            of the previous call is kept. By default False
+        """
+        rng = self.rng if rng is None else np.random.default_rng(rng)
+        if discard is None:
+            discard = self.burn_in()
+
+        if append:
+            if self.last_point is None:
+                raise ValueError("there is no previous iteration to continue")
+            walkers, discard = len(self.last_point), 0
+            starts, color = self.last_point, self.last_color[:, None]
+            previous = self.last_corner
+        else:
+            if walkers == 1:
+                starts = self.st_point[None]
+            else:
+                starts = self._starting_point(walkers, rng=rng)
+            color = np.zeros(shape=(walkers, 1))
+            previous = None
+
+        shape = (walkers, -(-steps // walkers))
+        with stage("ChaosGame.iterate", shape[0] * shape[1]):
+            corner_list = self._pick_corners(shape, rng, previous)
+            if self.transition is not None and shape[1] > 0:
+                self.last_corner = corner_list[:, -1]
+
+            points = np.empty(shape=shape + (2,), dtype=self.dtype)
+            self.last_point = fill_recurrence(
+                points, starts, corner_list, self.corners, self.r
+            )
+
+        corner_list = corner_list[:, discard:]
+        colors, self.last_color = self._compute_color(corner_list, color)
+
+        corner_list, colors = corner_list.reshape(-1), colors.reshape(-1)
+        points = points[:, discard:].reshape(-1, 2)
+
+        if append:
+            # After load, iter_chunks or accumulate there are no earlier points
+            if self.points is None:
+                self.corner_list = np.empty(0, dtype=self.corner_dtype)
+                self.colors = np.empty(0, dtype=self.dtype)
+                self.points = np.empty(shape=(0, 2), dtype=self.dtype)
+
+            corner_list = np.concatenate([self.corner_list, corner_list])
+            colors = np.concatenate([self.colors, colors])
+            points = np.concatenate([self.points, points])
+
+        self.walkers, self.viewport = walkers, None
+        self.corner_list, self.colors, self.points = corner_list, colors, points
+
+    @property
+    def ifs(self):
+        """The game as an IFS, with one map contracting towards each corner.
+
+        The map of corner c is p -> r * p + (1 - r) * c, and all corners are
+        equally likely. A game with a corner rule has no IFS.
+        """
+        self._require_uniform()
+        coefficients = np.zeros(shape=(self.n, 2, 3))
+        coefficients[:, 0, 0] = coefficients[:, 1, 1] = self.r
+        coefficients[:, :, 2] = (1 - self.r) * self.corners
+
+        return IFS(coefficients, rng=self.rng)
+
+    def iterate_deterministic(self, depth, resolution=None):
+        """Generates points by applying the map of every corner to every point.
+
+        Starts from the corners, and applies all n maps to the whole point
+        set depth times, which covers the figure exactly down to that depth
+        instead of sampling it. Colors follow the same gradient as in
+        iterate. Sets points and colors.
+
+        Parameters
+        ----------
+        depth : int
+            Number of levels, giving n**(depth + 1) points
+        resolution : int, optional
+            Width of a grid over the extent, where only one point is kept in
+            each pixel after every level, by default no grid
+        """
+        grid = None if resolution is None else fit_resolution(self.extent, resolution)
+        points, colors = self.ifs.deterministic(
+            depth, extent=self.extent, resolution=grid
+        )
+
+        self.walkers, self.viewport = 1, None
+        self.corner_list = None
+        self.last_point = self.last_color = self.last_corner = None
+        self.points = points.astype(self.dtype, copy=False)
+        self.colors = colors.astype(self.dtype, copy=False)
+
+    def _cells(self, viewport, max_cells):
+        """Finds the addresses whose part of the figure meets a viewport.
+
+        The corners a_1, ..., a_d most recently picked map the whole figure
+        to r**d * figure + t, with the offset t given by the corners. Starting
+        from the whole figure, every cell is split into the n cells of one
+        more corner, and only the cells whose bounding box meets the viewport
+        are kept, until the cells are no larger than the viewport.
+
+        Parameters
+        ----------
+        viewport : tuple of float
+            The area, as (xmin, xmax, ymin, ymax)
+        max_cells : int
+            Largest number of cells to be kept
+
+        Returns
+        -------
+        scale : float
+            The factor r**d of every cell
+        offsets : ndarray (m, 2)
+            The offset t of each cell
+        weight : float
+            The factor 2**-d of the color gradient in every cell
+        shades : ndarray (m, )
+            The color gradient added by the corners of each cell
+        """
+        xmin, xmax, ymin, ymax = viewport
+        low, high = self.corners.min(axis=0), self.corners.max(axis=0)
+        size = max(xmax - xmin, ymax - ymin)
+
+        scale, weight = 1.0, 1.0
+        offsets, shades = np.zeros(shape=(1, 2)), np.zeros(1)
+
+        while scale * np.max(high - low) > size and len(offsets) * self.n <= max_cells:
+            offsets = offsets[:, None] + scale * (1 - self.r) * self.corners
+            weight, scale = weight / 2, scale * self.r
+            shades = shades[:, None] + weight * np.arange(self.n)
+
+            lo, hi = offsets + scale * low, offsets + scale * high
+            keep = (lo[..., 0] <= xmax) & (hi[..., 0] >= xmin)
+            keep &= (lo[..., 1] <= ymax) & (hi[..., 1] >= ymin)
+            offsets, shades = offsets[keep], shades[keep]
+
+            if len(offsets) == 0:
+                raise ValueError("the viewport does not meet the figure")
+
+        return scale, offsets, weight, shades
+
+    def zoom(self, viewport, steps, discard=5, max_cells=2 ** 16, rng=None):
+        """Generates points of the part of the figure inside a viewport.
+
+        Instead of generating the whole figure and keeping the few points
+        inside a small viewport, only the cells of the figure that can reach
+        the viewport are sampled: points of the whole figure are mapped into
+        a randomly picked cell by the corners of its address. The cells are
+        about as large as the viewport, so the number of points inside the
+        viewport depends on steps, not on how deep the zoom is.
+
+        Sets points and colors to the points inside the viewport, and
+        viewport, so that plot and write_png draw only the viewport.
+
+        Parameters
+        ----------
+        viewport : tuple of float
+            The area, as (xmin, xmax, ymin, ymax)
+        steps : int
+            Number of points generated, most of which land in the viewport
         discard : int, optional
             Number of first points to be discarded, by default 5
+        max_cells : int, optional
+            Largest number of cells to be sampled, by default 2**16
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the game
         """
+        rng = self.rng if rng is None else np.random.default_rng(rng)
+        self._require_uniform()
+        scale, offsets, weight, shades = self._cells(viewport, max_cells)
 
-        corner_list = np.zeros(shape=(steps,))
-        random_corner = np.random.randint(self.n)
-        corner_list[0] = random_corner
+        self.iterate(steps + discard, discard, rng=rng)
 
-        midway_point = (
-            self.r * self.st_point + (1 - self.r) * self.corners[random_corner]
-        )
+        with stage("ChaosGame.zoom", len(self.points)):
+            cell = rng.integers(len(offsets), size=len(self.points))
+            points = scale * self.points + offsets[cell]
+            colors = weight * self.colors + shades[cell]
+
+            xmin, xmax, ymin, ymax = viewport
+            inside = (points[:, 0] >= xmin) & (points[:, 0] <= xmax)
+            inside &= (points[:, 1] >= ymin) & (points[:, 1] <= ymax)
 
-        points = np.zeros(shape=(steps, 2))
-        points[0] = midway_point
+        # The walkers are still in the whole figure, so they cannot be continued
+        self.corner_list = None
+        self.last_point = self.last_color = self.last_corner = None
+        self.points = points[inside].astype(self.dtype, copy=False)
+        self.colors = colors[inside].astype(self.dtype, copy=False)
+        self.viewport = tuple(float(x) for x in viewport)
 
-        for i in range(1, steps):
-            random_corner = np.random.randint(self.n)
-            corner_list[i] = random_corner
+    def iter_chunks(self, total, chunk_size=2 ** 20, discard=5, rng=None, resume=False):
+        """Generates points in blocks of fixed size.
 
-            points[i] = (
-                self.r * points[i - 1] + (1 - self.r) * self.corners[random_corner]
+        Works like iterate, but yields the points and colors one block at a
+        time, carrying the current point and color over to the next block, so
+        that arbitrarily long runs only need memory for one block. The current
+        point and color are kept in last_point and last_color after each
+        block.
+
+        Parameters
+        ----------
+        total : int
+            Number of points to be generated, after discarding
+        chunk_size : int, optional
+            Number of points in each block, by default 2**20
+        discard : int or None, optional
+            Number of first points to be discarded, or None to use burn_in,
+            by default 5
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the game
+        resume : bool, optional
+            Continues from the last point and color of the last walker
+            instead of the starting point, without discarding, by default False
+
+        Yields
+        ------
+        points : ndarray (chunk_size, 2)
+            Coordinates for the randomly picked points
+        colors : ndarray (chunk_size, )
+            Color gradient values of the points
+        """
+        rng = self.rng if rng is None else np.random.default_rng(rng)
+        if discard is None:
+            discard = self.burn_in()
+
+        if resume:
+            if self.last_point is None:
+                raise ValueError("there is no previous iteration to continue")
+            point, color = self.last_point[-1], self.last_color[-1]
+            corner = None if self.last_corner is None else self.last_corner[-1]
+        else:
+            point, corner = self.st_point, None
+            if discard > 0:
+                corner_list = self._pick_corners((discard,), rng)
+                corner = corner_list[-1]
+                targets = self.corners[corner_list]
+                point = linear_recurrence(point, targets, self.r)[-1]
+            color = 0
+
+        for lo in range(0, total, chunk_size):
+            size = min(chunk_size, total - lo)
+            with stage("ChaosGame.iter_chunks", size):
+                corner_list = self._pick_corners((size,), rng, corner)
+                corner = corner_list[-1]
+
+                points = linear_recurrence(point, self.corners[corner_list], self.r)
+                colors = color_gradient(corner_list, start=color)
+                point, color = points[-1].copy(), colors[-1]
+            self.last_point, self.last_color = point[None], np.array([color])
+            if self.transition is not None:
+                self.last_corner = np.array([corner])
+
+            yield points.astype(self.dtype, copy=False), colors.astype(
+                self.dtype, copy=False
             )
 
-        self.corner_list = corner_list[discard:]
-        self.colors = self._compute_color()
-        self.points = points[discard:]
+    @property
+    def extent(self):
+        """The bounding box of the ngon, as (xmin, xmax, ymin, ymax)."""
+        (xmin, ymin), (xmax, ymax) = self.corners.min(axis=0), self.corners.max(axis=0)
+
+        return (xmin, xmax, ymin, ymax)
+
+    @property
+    def _area(self):
+        """The area drawn by plot and write_png, the viewport after a zoom."""
+        return self.extent if self.viewport is None else self.viewport
 
-    def plot(self, color=False, cmap="jet"):
+    def plot(self, color=False, cmap="jet", resolution=None):
         """Creates a plot of the generated points.
 
         Parameters
@@ -137,19 +623,24 @@ class ChaosGame:
             Uses a color gradient if True, and keeps the points black if False
             , by default False
         cmap : str, optional
-            [description], by default "jet"
+            Colormap used for the color gradient, by default "jet"
+        resolution : int, optional
+            Width in pixels of a density image to draw instead of a scatter
+            plot, by default only used for large numbers of points
         """
 
-        if color == True:
-            colors = self.colors
-        else:
-            colors = "black"
-
-        plt.scatter(*zip(*self.points), s=1, c=colors, cmap=cmap)
+        with stage("ChaosGame.plot", len(self.points)):
+            plot_points(
+                self.points,
+                values=self.colors if color else None,
+                cmap=cmap,
+                extent=self._area,
+                resolution=resolution,
+            )
 
-        plt.axis("equal")
+        pyplot().axis("equal")
 
-    def show(self, color=False, cmap="jet"):
+    def show(self, color=False, cmap="jet", resolution=None):
         """Creates a plot of the generated points and shows it.
 
         Parameters
@@ -158,30 +649,44 @@ class ChaosGame:
             Uses a color gradient if True, and keeps the points black if False
             , by default False
         cmap : str, optional
-            [description], by default "jet"
+            Colormap used for the color gradient, by default "jet"
+        resolution : int, optional
+            Width in pixels of a density image to draw instead of a scatter
+            plot, by default only used for large numbers of points
         """
 
-        self.plot(color=color, cmap=cmap)
+        self.plot(color=color, cmap=cmap, resolution=resolution)
+        plt = pyplot()
         plt.show()
         plt.close()
 
-    def _compute_color(self):
+    def _compute_color(self, corner_list, start):
         """Computes the points to be used as the color gradient when plotting.
 
+        Parameters
+        ----------
+        corner_list : ndarray (walkers, m)
+            The picked corner indexes of each walker
+        start : ndarray (walkers, 1)
+            Color of each walker before its first point
+
         Returns
         -------
-        color : ndarray
-            [description]
+        color : ndarray (walkers, m)
+            Color value of each point
+        state : ndarray (walkers, )
+            Color of each walker after its last point
         """
 
-        color = np.zeros(shape=(self.corner_list.shape[0],))
+        # color[i] = (color[i - 1] + corner_list[i]) / 2
+        with stage("ChaosGame.color", corner_list.size):
+            color = np.empty(shape=corner_list.shape + (1,), dtype=self.dtype)
+            indexes = np.arange(self.n, dtype=float)[:, None]
+            state = fill_recurrence(color, start, corner_list, indexes, 1 / 2)
 
-        for i, corner in enumerate(self.corner_list):
-            color[i] = (color[i - 1] + self.corner_list[i]) / 2
+        return color[..., 0], state[..., 0]
 
-        return color
-
-    def savepng(self, outfile, color=False, cmap="jet"):
+    def savepng(self, outfile, color=False, cmap="jet", resolution=None):
         """Creates a plot and saves it as a png file.
 
         Parameters
@@ -192,7 +697,10 @@ class ChaosGame:
             Uses a color gradient if True, and keeps the points black if False
             , by default False
         cmap : str, optional
-            [description], by default "jet"
+            Colormap used for the color gradient, by default "jet"
+        resolution : int, optional
+            Width in pixels of a density image to draw instead of a scatter
+            plot, by default only used for large numbers of points
         """
 
         outfile = outfile.split(".")
@@ -200,10 +708,213 @@ class ChaosGame:
         if len(outfile) != 1:
             assert outfile[1] == "png", "Output file format must be .png"
 
-        self.plot(color=color, cmap=cmap)
+        with stage("ChaosGame.savepng", len(self.points)):
+            self.plot(color=color, cmap=cmap, resolution=resolution)
 
-        plt.savefig("figures/" + outfile[0] + ".png", dpi=300)
-        plt.close()
+            plt = pyplot()
+            plt.savefig("figures/" + outfile[0] + ".png", dpi=300)
+            plt.close()
+
+    def write_png(self, path, resolution=1024, color=False, cmap="jet"):
+        """Writes the generated points straight to a png file as a density image.
+
+        Does not use matplotlib, so the time taken only depends on the number
+        of pixels once the points are binned.
+
+        Parameters
+        ----------
+        path : String
+            Path of the output file
+        resolution : int, optional
+            Width of the image in pixels, by default 1024
+        color : bool, optional
+            Uses a color gradient if True, and keeps the points black if False
+            , by default False
+        cmap : str, optional
+            Colormap used for the color gradient, by default "jet"
+        """
+        with stage("ChaosGame.write_png", len(self.points)):
+            histogram = Histogram(self._area, fit_resolution(self._area, resolution))
+            histogram.add(self.points, self.colors if color else None)
+            histogram.save_png(path, cmap=cmap, vmin=0, vmax=self.n - 1)
+
+    def accumulate(self, steps, resolution=1024, chunk_size=2 ** 20, rng=None):
+        """Bins more points into the histogram of the game.
+
+        The first call starts a new histogram covering the extent. Later
+        calls continue from where the last one stopped and add to the same
+        histogram, so a render can be refined without redoing earlier work.
+
+        Parameters
+        ----------
+        steps : int
+            Number of points to be added
+        resolution : int, optional
+            Width of a new histogram in pixels, by default 1024
+        chunk_size : int, optional
+            Number of points generated at a time, by default 2**20
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the game
+
+        Returns
+        -------
+        Histogram
+            The histogram of all points binned so far
+        """
+        resume = self.histogram is not None and self.last_point is not None
+        if self.histogram is None:
+            self.histogram = Histogram(
+                self.extent, fit_resolution(self.extent, resolution)
+            )
+
+        for points, colors in self.iter_chunks(
+            steps, chunk_size, rng=rng, resume=resume
+        ):
+            self.histogram.add(points, colors)
+
+        return self.histogram
+
+    def converge(
+        self,
+        resolution=1024,
+        tolerance=0.5,
+        metric="l1",
+        threshold=None,
+        chunk_size=2 ** 18,
+        max_steps=10 ** 9,
+        rng=None,
+    ):
+        """Generates points until the density image stops changing.
+
+        Discards the points given by burn_in for the resolution and
+        tolerance, then bins points in chunks into a new histogram. Every
+        time the number of points has doubled, the histogram is compared with
+        the one at half as many points, and generation stops once the change
+        is below the threshold. Comparing against a fixed fraction of the
+        samples makes the stopping point independent of chunk_size. Sets
+        histogram, and samples to the number of points used.
+
+        Parameters
+        ----------
+        resolution : int, optional
+            Width of the histogram in pixels, by default 1024
+        tolerance : float, optional
+            Largest distance from the figure of the first point kept, in
+            pixels, by default 0.5
+        metric : str, optional
+            "l1" for the sum of the absolute changes of the normalized
+            density, or "new_pixels" for the number of pixels filled since the
+            last check relative to the number filled then, by default "l1"
+        threshold : float, optional
+            The change at which the histogram has converged, by default 0.05
+            for "l1" and 0.01 for "new_pixels"
+        chunk_size : int, optional
+            Number of points added between two checks, by default 2**18
+        max_steps : int, optional
+            Largest number of points generated, by default 10**9
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the game
+
+        Returns
+        -------
+        Histogram
+            The converged histogram
+        """
+        if metric not in ("l1", "new_pixels"):
+            raise ValueError('metric must be "l1" or "new_pixels"')
+        if threshold is None:
+            threshold = 0.05 if metric == "l1" else 0.01
+
+        resolution = fit_resolution(self.extent, resolution)
+        self.histogram = Histogram(self.extent, resolution)
+        discard = self.burn_in(resolution[0], tolerance)
+        self.samples = 0
+
+        before, checked = None, 0
+
+        for points, colors in self.iter_chunks(max_steps, chunk_size, discard, rng):
+            self.histogram.add(points, colors)
+            self.samples += len(points)
+
+            counts = self.histogram.counts
+            if self.samples < 2 * checked or not counts.any():
+                continue
+            if before is None or not before.any():
+                before, checked = counts.copy(), self.samples
+                continue
+
+            if metric == "l1":
+                density = counts / counts.sum()
+                change = np.abs(density - before / before.sum()).sum()
+            else:
+                filled = np.count_nonzero(before)
+                change = (np.count_nonzero(counts) - filled) / filled
+
+            if change < threshold:
+                break
+            before, checked = counts.copy(), self.samples
+
+        return self.histogram
+
+    def save(self, path):
+        """Saves the state of the game to a checkpoint file.
+
+        Stores the parameters, the random number generator, the last point,
+        color and corner of every walker and the histogram, so that load gives a
+        game that continues exactly where this one stopped. The generated
+        points themselves are not stored.
+
+        Parameters
+        ----------
+        path : str
+            Path of the .npz file
+        """
+        checkpoint.save(
+            path,
+            self.rng,
+            self.histogram,
+            n=self.n,
+            r=self.r,
+            dtype=self.dtype.str,
+            st_point=self.st_point,
+            last_point=self.last_point,
+            last_color=self.last_color,
+            transition=self.transition,
+            last_corner=self.last_corner,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Loads a game from a checkpoint file written by save.
+
+        Parameters
+        ----------
+        path : str
+            Path of the .npz file
+
+        Returns
+        -------
+        ChaosGame
+            The game, ready to continue with iterate(append=True),
+            iter_chunks(resume=True) or accumulate
+        """
+        state, rng, histogram = checkpoint.load(path)
+
+        game = cls(
+            int(state["n"]),
+            float(state["r"]),
+            dtype=str(state["dtype"]),
+            rule=state.get("transition"),
+        )
+        game.rng, game.histogram = rng, histogram
+        game.st_point = state["st_point"]
+        game.last_point = state.get("last_point")
+        game.last_color = state.get("last_color")
+        game.last_corner = state.get("last_corner")
+
+        return game
 
 
 if __name__ == "__main__":
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+from raster import Histogram
+
+
+def save(path, rng, histogram=None, **arrays):
+    """Writes a random number generator, a histogram and arrays to a .npz file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the .npz file
+    rng : Generator
+        The random number generator, whose state is stored
+    histogram : Histogram, optional
+        The histogram, by default None
+    **arrays
+        Other values to be stored, None values are left out
+    """
+    state = {key: value for key, value in arrays.items() if value is not None}
+    state["rng"] = json.dumps(rng.bit_generator.state)
+
+    if histogram is not None:
+        state.update(extent=histogram.extent, counts=histogram.counts)
+        if histogram.sums is not None:
+            state.update(sums=histogram.sums)
+
+    np.savez(path, **state)
+
+
+def load(path):
+    """Reads a file written by save.
+
+    Parameters
+    ----------
+    path : str
+        Path of the .npz file
+
+    Returns
+    -------
+    arrays : dict
+        The other values that were stored
+    rng : Generator
+        The random number generator, in the state it was saved in
+    histogram : Histogram or None
+        The histogram, if one was stored
+    """
+    with np.load(path) as state:
+        arrays = {key: state[key] for key in state.files}
+
+    rng = json.loads(str(arrays.pop("rng")))
+    generator = np.random.Generator(getattr(np.random, rng["bit_generator"])())
+    generator.bit_generator.state = rng
+
+    histogram = None
+    if "counts" in arrays:
+        counts = arrays.pop("counts")
+        height, width = counts.shape
+        histogram = Histogram(tuple(arrays.pop("extent")), (width, height))
+        histogram.counts = counts
+        histogram.sums = arrays.pop("sums", None)
+
+    return arrays, generator, histogram
@@ -1,5 +1,8 @@
 import numpy as np
-import matplotlib.pyplot as plt
+import checkpoint
+from ifs import IFS
+from profiling import stage
+from raster import Histogram, fit_resolution, plot_points, pyplot
 
 
 class AffineTransform:
@@ -36,21 +39,41 @@ class AffineTransform:
         self.f = f
 
     def __call__(self, x, y):
-        return np.array([[self.a, self.b], [self.c, self.d]]) @ np.array(
-            [x, y]
-        ) + np.array([self.e, self.f])
+        return np.array(
+            [self.a * x + self.b * y + self.e, self.c * x + self.d * y + self.f]
+        )
 
 
 class Fern:
     """Uses AffineTransform to create Barnsley Fern.
 
-    Returns
-    -------
-    [type]
-        [description]
+    The transformations are stacked into an IFS, which generates the points.
+
+    Attributes
+    ----------
+    functions : list of AffineTransform
+        The four transformations of the fern
+    prob_cumulative : ndarray (4, )
+        Cumulative probabilities of picking each transformation
+    ifs : IFS
+        The iterated function system built from the transformations
+    last_point : ndarray (1, 2), or None
+        The point where iter_chunks continues with resume
+    histogram : Histogram, or None
+        The points binned so far by accumulate
+    ----------
+    dtype : dtype, optional
+        Type of the points, for example float32 to halve their memory
+        , by default float64
+    rng : Generator or int, optional
+        Random number generator, or a seed for one, by default a new PCG64
+        generator
     """
 
-    def __init__(self):
+    # Bounding box of the fern, as (xmin, xmax, ymin, ymax)
+    extent = (-2.1820, 2.6558, 0.0, 9.9983)
+
+    def __init__(self, dtype=np.float64, rng=None):
         func1 = AffineTransform(0, 0, 0, 0.16, 0, 0)
         func2 = AffineTransform(0.85, 0.04, -0.04, 0.85, 0, 1.60)
         func3 = AffineTransform(0.20, -0.26, 0.23, 0.22, 0, 1.60)
@@ -58,7 +81,12 @@ class Fern:
         self.functions = [func1, func2, func3, func4]
 
         probabilities = [0.01, 0.85, 0.07, 0.07]
-        self.prob_cumulative = np.cumsum(probabilities)
+        self.rng = np.random.default_rng(rng)
+        self.ifs = IFS(self.functions, probabilities, rng=self.rng)
+        self.prob_cumulative = self.ifs.prob_cumulative
+        self.dtype = np.dtype(dtype)
+        self.last_point = None
+        self.histogram = None
 
     def choose_function(self):
         """Chooses a transformation function at random.
@@ -70,31 +98,132 @@ class Fern:
         AffineTransform
             A randomly chosen transformation function
         """
-        r = np.random.random()
-        for j, p in enumerate(self.prob_cumulative):
-            if r < p:
-                return self.functions[j]
+        return self.functions[self.ifs.choose()]
+
+    def _starting_point(self, size=None, rng=None):
+        """Returns a random starting point on the fern.
 
-    def iterate(self, n):
+        Picks the fixed point of one of the transformations at random.
+
+        Parameters
+        ----------
+        size : int, optional
+            Number of starting points, by default a single point
+        rng : Generator, optional
+            Random number generator, by default the one of the fern
+
+        Returns
+        -------
+        point : ndarray (2, ) or (size, 2)
+            Random starting point
+        """
+        return self.ifs.fixed_points()[self.ifs.choose(size, rng)]
+
+    def iterate(self, n, walkers=1, discard=0, rng=None):
         """Generates points iteratively by using affine transformations
 
+        With more than one walker, every walker starts from its own random
+        starting point and they are all advanced together.
+
         Parameters
         ----------
         n : int
             Number of iterations
+        walkers : int, optional
+            Number of independent walkers, each doing n / walkers iterations
+            , by default 1
+        discard : int, optional
+            Number of first points of each walker to be discarded, by default 0
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the fern
         """
+        rng = self.rng if rng is None else np.random.default_rng(rng)
         self.n = n
+        self.walkers = walkers
+
+        steps = -(-n // walkers)
+        if walkers == 1:
+            starts = np.zeros(shape=(1, 2))
+        else:
+            starts = self._starting_point(walkers, rng)
 
-        points = np.zeros(shape=(self.n, 2))
-        points[0] = [0, 0]
+        with stage("Fern.iterate", walkers * steps):
+            points = np.empty(shape=(walkers, steps, 2), dtype=self.dtype)
+            points[:, 0] = starts
+            self.ifs.iterate(steps - 1, start=starts, out=points[:, 1:], rng=rng)
 
-        for i in range(1, self.n):
-            func = self.choose_function()
-            points[i] = func(points[i - 1][0], points[i - 1][1])
+        self.points = points[:, discard:].reshape(-1, 2)
 
-        self.points = points
+    def iterate_deterministic(self, depth, resolution=None):
+        """Generates points by applying every transformation to every point.
 
-    def plot(self, s=1, c="green"):
+        Starts from the fixed points of the transformations, and applies all
+        four to the whole point set depth times. This covers the fern evenly
+        down to that depth, with no random sampling. Sets points.
+
+        Parameters
+        ----------
+        depth : int
+            Number of levels, giving 4**(depth + 1) points
+        resolution : int, optional
+            Width of a grid over the extent, where only one point is kept in
+            each pixel after every level, by default no grid
+        """
+        grid = None if resolution is None else fit_resolution(self.extent, resolution)
+        points, _ = self.ifs.deterministic(depth, extent=self.extent, resolution=grid)
+
+        self.walkers = 1
+        self.points = points.astype(self.dtype, copy=False)
+
+    def iter_chunks(self, total, chunk_size=2 ** 20, rng=None, resume=False):
+        """Generates points in blocks of fixed size.
+
+        Works like iterate, but yields the points one block at a time,
+        carrying the current point over to the next block, so that
+        arbitrarily long runs only need memory for one block. The current
+        point is kept in last_point after each block.
+
+        Parameters
+        ----------
+        total : int
+            Number of points to be generated
+        chunk_size : int, optional
+            Number of points in each block, by default 2**20
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the fern
+        resume : bool, optional
+            Continues from last_point instead of the origin, by default False
+
+        Yields
+        ------
+        points : ndarray (chunk_size, 2)
+            The generated points
+        indices : ndarray (chunk_size, )
+            Index of the transformation that generated each point, to be used
+            as color values
+        """
+        rng = self.rng if rng is None else np.random.default_rng(rng)
+
+        if resume:
+            if self.last_point is None:
+                raise ValueError("there is no previous iteration to continue")
+            point = self.last_point[-1]
+        else:
+            point = np.zeros(2)
+
+        for lo in range(0, total, chunk_size):
+            size = min(chunk_size, total - lo)
+            with stage("Fern.iter_chunks", size):
+                points = np.empty(shape=(size, 2), dtype=self.dtype)
+                _, indices = self.ifs.iterate(size, point, out=points, rng=rng)
+                point = points[-1].astype(float)
+                self.last_point = point[None]
+
+            yield points, indices
+
+    def plot(self, s=1, c="green", resolution=None):
         """Plots the fern.
 
         Parameters
@@ -103,12 +232,115 @@ class Fern:
             Size of the points, by default 1
         c : str, optional
             Color of the fern, by default "green"
+        resolution : int, optional
+            Width in pixels of a density image to draw instead of a scatter
+            plot, by default only used for large numbers of points
         """
-        plt.scatter(*zip(*self.points), s=s, c=c)
+        with stage("Fern.plot", len(self.points)):
+            plot_points(
+                self.points, s=s, color=c, extent=self.extent, resolution=resolution
+            )
+        plt = pyplot()
         plt.axis("equal")
         plt.savefig("figures/barnsley_fern.png", dpi=300)
         plt.show()
 
+    def write_png(self, path, resolution=1024, c="green"):
+        """Writes the fern straight to a png file as a density image.
+
+        Does not use matplotlib, so the time taken only depends on the number
+        of pixels once the points are binned.
+
+        Parameters
+        ----------
+        path : str
+            Path of the output file
+        resolution : int, optional
+            Width of the image in pixels, by default 1024
+        c : str, optional
+            Color of the fern, by default "green"
+        """
+        with stage("Fern.write_png", len(self.points)):
+            histogram = Histogram(
+                self.extent, fit_resolution(self.extent, resolution)
+            )
+            histogram.add(self.points)
+            histogram.save_png(path, color=c)
+
+    def accumulate(self, n, resolution=1024, chunk_size=2 ** 20, rng=None):
+        """Bins more points into the histogram of the fern.
+
+        The first call starts a new histogram covering the extent, with the
+        transformation indexes as color values. Later calls continue from
+        where the last one stopped and add to the same histogram.
+
+        Parameters
+        ----------
+        n : int
+            Number of points to be added
+        resolution : int, optional
+            Width of a new histogram in pixels, by default 1024
+        chunk_size : int, optional
+            Number of points generated at a time, by default 2**20
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the fern
+
+        Returns
+        -------
+        Histogram
+            The histogram of all points binned so far
+        """
+        resume = self.histogram is not None and self.last_point is not None
+        if self.histogram is None:
+            self.histogram = Histogram(
+                self.extent, fit_resolution(self.extent, resolution)
+            )
+
+        for points, indices in self.iter_chunks(n, chunk_size, rng, resume=resume):
+            self.histogram.add(points, indices)
+
+        return self.histogram
+
+    def save(self, path):
+        """Saves the random number generator, last point and histogram.
+
+        Parameters
+        ----------
+        path : str
+            Path of the .npz checkpoint file
+        """
+        checkpoint.save(
+            path,
+            self.rng,
+            self.histogram,
+            dtype=self.dtype.str,
+            last_point=self.last_point,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Loads a fern from a checkpoint file written by save.
+
+        Parameters
+        ----------
+        path : str
+            Path of the .npz checkpoint file
+
+        Returns
+        -------
+        Fern
+            The fern, ready to continue with iter_chunks(resume=True) or
+            accumulate
+        """
+        state, rng, histogram = checkpoint.load(path)
+
+        fern = cls(dtype=str(state["dtype"]), rng=rng)
+        fern.histogram = histogram
+        fern.last_point = state.get("last_point")
+
+        return fern
+
 
 if __name__ == "__main__":
     fern = Fern()
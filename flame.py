@@ -0,0 +1,241 @@
+import numpy as np
+from ifs import IFS
+from raster import Histogram, fit_resolution, pyplot
+from variations import Variations
+
+
+def _fit_extent(extent, resolution):
+    """Returns the extent widened around its center to the aspect of a resolution.
+
+    Parameters
+    ----------
+    extent : tuple of float
+        The area covered, as (xmin, xmax, ymin, ymax)
+    resolution : tuple of int
+        Number of pixels as (width, height)
+
+    Returns
+    -------
+    tuple of float
+        The smallest extent containing the given one with square pixels
+    """
+    xmin, xmax, ymin, ymax = extent
+    width, height = resolution
+    x, y = (xmin + xmax) / 2, (ymin + ymax) / 2
+    half_x, half_y = (xmax - xmin) / 2, (ymax - ymin) / 2
+
+    if half_x * height < half_y * width:
+        half_x = half_y * width / height
+    else:
+        half_y = half_x * height / width
+
+    return (x - half_x, x + half_x, y - half_y, y + half_y)
+
+
+class Flame:
+    """A fractal flame built from affine maps followed by variations.
+
+    Every map is an affine transformation followed by a linear combination of
+    the variations in Variations, and has a color index. The variations are
+    applied inside the iteration, to every walker that picked the map.
+
+    Attributes
+    ----------
+    ifs : IFS
+        The affine part of the maps, with their probabilities
+    blends : list of dict
+        The linear combination of variations of each map, as name: weight
+    colors : ndarray (k, )
+        Color index of each map, between 0 and 1
+    ----------
+    functions : list of AffineTransform or array_like (k, 2, 3)
+        The affine part of the maps
+    blends : list of dict
+        The linear combination of variations of each map, as name: weight
+    probabilities : list of float, optional
+        Probability of picking each map, by default uniform
+    colors : list of float, optional
+        Color index of each map, by default evenly spaced between 0 and 1
+    rng : Generator or int, optional
+        Random number generator, or a seed for one, by default a new PCG64
+        generator
+    """
+
+    def __init__(self, functions, blends, probabilities=None, colors=None, rng=None):
+        self.rng = np.random.default_rng(rng)
+        self.ifs = IFS(functions, probabilities, rng=self.rng)
+
+        if len(blends) != len(self.ifs):
+            raise ValueError("there must be one blend of variations for each map")
+        if colors is None:
+            colors = np.linspace(0, 1, len(self.ifs))
+
+        self.blends = [dict(blend) for blend in blends]
+        self.colors = np.asarray(colors, dtype=float)
+
+    def _step(self, x, y, color, rng):
+        """Moves every walker with a randomly picked map.
+
+        Parameters
+        ----------
+        x, y : ndarray (K, )
+            Coordinates of the walkers, updated in place
+        color : ndarray (K, )
+            Color indexes of the walkers, updated in place
+        rng : Generator
+            Random number generator
+        """
+        indices = self.ifs.choose(x.size, rng=rng)
+        a, b, e, c, d, f = self.ifs.coefficients.reshape(-1, 6)[indices].T
+
+        u = a * x + b * y + e
+        v = c * x + d * y + f
+
+        for j, blend in enumerate(self.blends):
+            picked = indices == j
+            if not picked.any():
+                continue
+
+            x[picked], y[picked] = Variations(u[picked], v[picked])(
+                list(blend.values()), list(blend.keys())
+            )
+
+        color += self.colors[indices]
+        color /= 2
+
+        # Walkers that escape are restarted at a random point
+        lost = ~(np.isfinite(x) & np.isfinite(y))
+        if lost.any():
+            x[lost], y[lost] = rng.uniform(-1, 1, size=(2, lost.sum()))
+
+    def iter_chunks(
+        self, total, chunk_size=2 ** 20, walkers=2 ** 14, discard=20, rng=None
+    ):
+        """Generates points and color indexes in blocks of fixed size.
+
+        Advances all walkers together, and stores every step of every walker
+        after the first discarded steps.
+
+        Parameters
+        ----------
+        total : int
+            Number of points to be generated
+        chunk_size : int, optional
+            Number of points in each block, by default 2**20
+        walkers : int, optional
+            Number of independent walkers, by default 2**14
+        discard : int, optional
+            Number of first steps of each walker to be discarded, by default 20
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the flame
+
+        Yields
+        ------
+        points : ndarray (chunk_size, 2)
+            Coordinates of the generated points
+        colors : ndarray (chunk_size, )
+            Color index of each point
+        """
+        rng = self.rng if rng is None else np.random.default_rng(rng)
+        x, y = rng.uniform(-1, 1, size=(2, walkers))
+        color = rng.random(walkers)
+
+        for _ in range(discard):
+            self._step(x, y, color, rng)
+
+        steps = max(1, chunk_size // walkers)
+
+        for lo in range(0, total, steps * walkers):
+            size = min(steps * walkers, total - lo)
+            points = np.empty(shape=(-(-size // walkers), walkers, 2))
+            colors = np.empty(shape=points.shape[:2])
+
+            for i in range(points.shape[0]):
+                self._step(x, y, color, rng)
+                points[i, :, 0], points[i, :, 1], colors[i] = x, y, color
+
+            yield points.reshape(-1, 2)[:size], colors.reshape(-1)[:size]
+
+    def render(
+        self,
+        samples,
+        extent=(-1, 1, -1, 1),
+        resolution=1024,
+        supersample=2,
+        gamma=2.2,
+        cmap="jet",
+        walkers=2 ** 14,
+        rng=None,
+    ):
+        """Renders the flame into an RGBA image.
+
+        Points are binned into a supersampled histogram, which is box filtered
+        down to the final resolution and tone mapped with log-density and
+        gamma correction. Pixels are colored by their mean color index.
+
+        Parameters
+        ----------
+        samples : int
+            Number of points to be generated
+        extent : tuple of float, optional
+            The area covered, as (xmin, xmax, ymin, ymax), by default
+            (-1, 1, -1, 1)
+        resolution : int or tuple of int, optional
+            Number of pixels as width, with the height following the aspect
+            of the extent, or as (width, height), in which case the extent is
+            widened around its center to keep the pixels square, by default
+            1024
+        supersample : int, optional
+            Number of histogram pixels along each side of an image pixel
+            , by default 2
+        gamma : float, optional
+            Gamma correction of the density, by default 2.2
+        cmap : str, optional
+            Colormap of the color indexes, by default "jet"
+        walkers : int, optional
+            Number of independent walkers, by default 2**14
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the flame
+
+        Returns
+        -------
+        ndarray (height, width, 4)
+            The image, with the first row at the top of the extent
+        """
+        if np.ndim(resolution) == 0:
+            resolution = fit_resolution(extent, resolution)
+        else:
+            extent = _fit_extent(extent, resolution)
+
+        histogram = Histogram(
+            extent, (resolution[0] * supersample, resolution[1] * supersample)
+        )
+        for points, colors in self.iter_chunks(samples, walkers=walkers, rng=rng):
+            histogram.add(points, colors)
+
+        self.histogram = histogram.downsample(supersample)
+
+        return self.histogram.image(cmap=cmap, vmin=0, vmax=1, gamma=gamma)
+
+
+if __name__ == "__main__":
+    from fern import AffineTransform
+
+    flame = Flame(
+        [
+            AffineTransform(0.5, 0, 0, 0.5, -0.5, -0.5),
+            AffineTransform(0.5, 0, 0, 0.5, 0.5, -0.5),
+            AffineTransform(0.5, 0, 0, 0.5, 0, 0.5),
+        ],
+        [{"linear": 0.6, "swirl": 0.4}, {"disc": 1}, {"handkerchief": 1}],
+    )
+
+    image = flame.render(10 ** 7, resolution=800)
+
+    plt = pyplot()
+    plt.figure(figsize=(8, 8))
+    plt.imshow(image, extent=flame.histogram.extent)
+    plt.axis("off")
+    plt.show()
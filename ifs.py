@@ -0,0 +1,275 @@
+import numpy as np
+from profiling import progress, stage
+from raster import Histogram
+
+
+def _compose(outer, inner):
+    """Returns the coefficients of outer(inner(x)).
+
+    Both maps are given as stacked rows a, b, e, c, d, f, so that the map is
+    x' = a * x + b * y + e, y' = c * x + d * y + f.
+
+    Parameters
+    ----------
+    outer : ndarray (6, ...)
+        Coefficients of the map applied last
+    inner : ndarray (6, ...)
+        Coefficients of the map applied first
+
+    Returns
+    -------
+    ndarray (6, ...)
+        Coefficients of the composed map
+    """
+    a1, b1, e1, c1, d1, f1 = outer
+    a2, b2, e2, c2, d2, f2 = inner
+
+    composed = np.empty(shape=np.broadcast_shapes(outer.shape, inner.shape))
+    composed[0] = a1 * a2 + b1 * c2
+    composed[1] = a1 * b2 + b1 * d2
+    composed[2] = a1 * e2 + b1 * f2 + e1
+    composed[3] = c1 * a2 + d1 * c2
+    composed[4] = c1 * b2 + d1 * d2
+    composed[5] = c1 * e2 + d1 * f2 + f1
+
+    return composed
+
+
+class IFS:
+    """An iterated function system of affine maps.
+
+    All maps are stored as one stacked coefficient array, so that a whole
+    block of randomly chosen maps can be applied with array operations.
+
+    Attributes
+    ----------
+    coefficients : ndarray (k, 2, 3)
+        The maps as [[a, b, e], [c, d, f]]
+    probabilities : ndarray (k, )
+        Probability of picking each map
+    prob_cumulative : ndarray (k, )
+        Cumulative sum of the probabilities
+    ----------
+    functions : list of AffineTransform or array_like (k, 2, 3)
+        The maps of the system
+    probabilities : list of float, optional
+        Probability of picking each map, by default uniform
+    block : int, optional
+        Number of maps composed at once, by default 2**12
+    rng : Generator or int, optional
+        Random number generator, or a seed for one, by default a new PCG64
+        generator
+    """
+
+    def __init__(self, functions, probabilities=None, block=2 ** 12, rng=None):
+        if isinstance(functions, np.ndarray):
+            coefficients = np.array(functions, dtype=float)
+        else:
+            coefficients = np.array(
+                [[[f.a, f.b, f.e], [f.c, f.d, f.f]] for f in functions], dtype=float
+            )
+
+        if coefficients.ndim != 3 or coefficients.shape[1:] != (2, 3):
+            raise ValueError("functions must be a list of maps or a (k, 2, 3) array")
+
+        k = coefficients.shape[0]
+        if probabilities is None:
+            probabilities = np.full(k, 1 / k)
+        probabilities = np.asarray(probabilities, dtype=float)
+
+        if probabilities.shape != (k,):
+            raise ValueError("there must be one probability for each map")
+        if np.any(probabilities < 0) or not np.sum(probabilities) > 0:
+            raise ValueError("probabilities must be non-negative and not all zero")
+
+        self.coefficients = coefficients
+        self.index_dtype = np.min_scalar_type(k - 1)
+        self.probabilities = probabilities / np.sum(probabilities)
+        self.prob_cumulative = np.cumsum(self.probabilities)
+        self.block = block
+        self.rng = np.random.default_rng(rng)
+
+    def __len__(self):
+        return self.coefficients.shape[0]
+
+    def fixed_points(self):
+        """Returns the fixed point of each map.
+
+        The fixed points of contractive maps lie on the attractor, which makes
+        them burn-in free starting points.
+
+        Returns
+        -------
+        ndarray (k, 2)
+            The points x with f_j(x) = x
+        """
+        linear = self.coefficients[:, :, :2]
+        offset = self.coefficients[:, :, 2]
+
+        return np.linalg.solve(np.eye(2) - linear, offset[..., None])[..., 0]
+
+    def choose(self, size=None, rng=None):
+        """Picks map indices at random, weighted by the probabilities.
+
+        Parameters
+        ----------
+        size : int or tuple of int, optional
+            Shape of the returned indices, by default a single index
+        rng : Generator, optional
+            Random number generator, by default the one of the system
+
+        Returns
+        -------
+        int or ndarray of uint8 or uint16
+            Randomly picked map indices
+        """
+        u = (self.rng if rng is None else rng).random(size)
+        index = np.searchsorted(self.prob_cumulative, u, side="right")
+
+        return np.minimum(index, len(self) - 1).astype(self.index_dtype)
+
+    def _prefix(self, indices):
+        """Composes sequences of maps into their running compositions.
+
+        Uses a Hillis-Steele scan, so a block of m maps takes log2(m) passes
+        of array operations.
+
+        Parameters
+        ----------
+        indices : ndarray (..., m) of int
+            Map indices in the order they are applied
+
+        Returns
+        -------
+        maps : ndarray (6, ..., m)
+            Coefficients of f_i o ... o f_0 for every i, as rows a, b, e, c, d, f
+        """
+        maps = np.moveaxis(self.coefficients.reshape(-1, 6)[indices], -1, 0)
+
+        offset = 1
+        while offset < maps.shape[-1]:
+            maps[..., offset:] = _compose(maps[..., offset:], maps[..., :-offset])
+            offset *= 2
+
+        return maps
+
+    def iterate(self, steps, start=(0, 0), out=None, rng=None):
+        """Generates points by applying randomly picked maps.
+
+        Draws all the map indices at once, and handles them in blocks whose
+        running compositions are applied to the current point. Several
+        independent walkers are advanced together by passing one starting
+        point per walker.
+
+        Parameters
+        ----------
+        steps : int
+            Number of points to be generated by each walker
+        start : array_like (..., 2), optional
+            Point the first map is applied to, by default (0, 0)
+        out : ndarray (..., steps, 2), optional
+            Array to store the points in, which may for example be float32.
+            The points are always computed in float64. By default a new
+            float64 array.
+        rng : Generator, optional
+            Random number generator, by default the one of the system
+
+        Returns
+        -------
+        points : ndarray (..., steps, 2)
+            The generated points
+        indices : ndarray (..., steps)
+            The index of the map that generated each point
+        """
+        start = np.asarray(start, dtype=float)
+        walkers = start.shape[:-1]
+
+        indices = self.choose((*walkers, steps), rng)
+        points = np.empty(shape=(*walkers, steps, 2)) if out is None else out
+        x, y = start[..., 0, None], start[..., 1, None]
+
+        # Keep the number of maps composed at once the same for any number of
+        # walkers; with very many walkers this becomes one step at a time.
+        block = max(1, self.block // max(1, int(np.prod(walkers))))
+
+        for lo in range(0, steps, block):
+            a, b, e, c, d, f = self._prefix(indices[..., lo : lo + block])
+
+            x, y = a * x + b * y + e, c * x + d * y + f
+
+            points[..., lo : lo + block, 0] = x
+            points[..., lo : lo + block, 1] = y
+            x, y = x[..., -1:], y[..., -1:]
+            progress(min(lo + block, steps) * indices.size // steps, indices.size)
+
+        return points, indices
+
+    def deterministic(
+        self, depth, start=None, colors=None, extent=None, resolution=None
+    ):
+        """Applies every map to every point, depth times, without randomness.
+
+        Each level applies all k maps to the whole point set at once, so the
+        points are multiplied by k per level. With a resolution, only one
+        point is kept in each pixel of a grid over the extent after every
+        level, so that the number of points is bounded by the number of
+        pixels instead of growing exponentially. Points outside the extent
+        are then dropped.
+
+        Every point also carries a color, which becomes the mean of its color
+        and the color of the map applied, as in color_gradient.
+
+        Parameters
+        ----------
+        depth : int
+            Number of levels
+        start : array_like (m, 2), optional
+            The first point set, by default the fixed points of the maps,
+            which lie on the attractor
+        colors : array_like (k, ), optional
+            Color of each map, by default the map indices
+        extent : tuple of float, optional
+            The area of the grid, as (xmin, xmax, ymin, ymax), needed with a
+            resolution
+        resolution : int or tuple of int, optional
+            Number of pixels of the grid as width or (width, height), by
+            default the points are not deduplicated
+
+        Returns
+        -------
+        points : ndarray (m * k**depth, 2), or fewer with a resolution
+            The point set of the last level
+        values : ndarray (m * k**depth, )
+            Color of each point
+        """
+        k = len(self)
+        colors = np.arange(k, dtype=float) if colors is None else np.asarray(colors)
+        linear = self.coefficients[:, :, :2]
+        offset = self.coefficients[:, None, :, 2]
+
+        if start is None:
+            points, values = self.fixed_points(), colors.astype(float)
+        else:
+            points = np.asarray(start, dtype=float).reshape(-1, 2)
+            values = np.zeros(len(points))
+
+        grid = None
+        if resolution is not None:
+            if extent is None:
+                raise ValueError("an extent is needed to deduplicate on a grid")
+            grid = Histogram(extent, resolution)
+
+        for _ in range(depth):
+            with stage("IFS.deterministic", k * len(points)):
+                # Map j of point i is linear[j] @ points[i] + offset[j]
+                points = np.matmul(points, linear.transpose(0, 2, 1)) + offset
+                values = (values + colors[:, None]) / 2
+
+                points, values = points.reshape(-1, 2), values.reshape(-1)
+
+                if grid is not None:
+                    index, inside = grid._pixels(points)
+                    _, first = np.unique(index, return_index=True)
+                    points, values = points[inside][first], values[inside][first]
+
+        return points, values
@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from raster import Histogram
+
+
+def _render_part(factory, steps, extent, resolution, seed, chunk_size):
+    """Generates points in a worker process and bins them into a histogram.
+
+    Parameters
+    ----------
+    factory : callable
+        Returns the object whose iter_chunks generates the points, when called
+        with the random number generator of the worker as rng
+    steps : int
+        Number of points to be generated by this worker
+    extent : tuple of float
+        The area covered, as (xmin, xmax, ymin, ymax)
+    resolution : int or tuple of int
+        Number of pixels as width or (width, height)
+    seed : SeedSequence
+        Seed of the random numbers of this worker
+    chunk_size : int
+        Number of points generated at a time
+
+    Returns
+    -------
+    Histogram
+        The points and colors of this worker
+    """
+    figure = factory(rng=np.random.default_rng(seed))
+    histogram = Histogram(extent, resolution)
+
+    for points, values in figure.iter_chunks(steps, chunk_size):
+        histogram.add(points, values)
+
+    return histogram
+
+
+def render(
+    factory,
+    steps,
+    extent=None,
+    resolution=1024,
+    seed=None,
+    workers=None,
+    chunk_size=2 ** 20,
+):
+    """Generates points in parallel processes and bins them into one histogram.
+
+    The steps are split evenly between the workers. Every worker gets its own
+    random numbers, spawned from a single seed, so the result only depends on
+    the seed and the number of workers.
+
+    Parameters
+    ----------
+    factory : callable
+        Returns the object whose iter_chunks generates the points, for example
+        functools.partial(ChaosGame, 3, 1 / 2) or Fern. It is called once in
+        every worker with its own generator as the rng keyword, and must be
+        picklable.
+    steps : int
+        Total number of points to be generated
+    extent : tuple of float, optional
+        The area covered, as (xmin, xmax, ymin, ymax), by default the extent
+        of the object returned by factory
+    resolution : int or tuple of int, optional
+        Number of pixels as width or (width, height), by default 1024
+    seed : int, optional
+        Seed of the random numbers, by default a new random seed
+    workers : int, optional
+        Number of worker processes, by default the number of CPUs
+    chunk_size : int, optional
+        Number of points generated at a time in each worker, by default 2**20
+
+    Returns
+    -------
+    Histogram
+        The merged histogram of all the workers
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if extent is None:
+        extent = factory().extent
+
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    share, rest = divmod(steps, workers)
+    shares = [share + (i < rest) for i in range(workers)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _render_part, factory, share, extent, resolution, s, chunk_size
+            )
+            for share, s in zip(shares, seeds)
+        ]
+        parts = [future.result() for future in futures]
+
+    histogram = parts[0]
+    for part in parts[1:]:
+        histogram.merge(part)
+
+    return histogram
@@ -0,0 +1,184 @@
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+# The collectors that are active, and the stages that are running
+_collectors = []
+_stages = []
+
+# Stand-in for a stage when nothing is collected
+_DISABLED = nullcontext()
+
+
+class Collector:
+    """Collects the wall time, points and memory of every stage.
+
+    Used as a context manager. While it is active, every instrumented stage
+    of ChaosGame, Fern, Triangle and Variations that ends adds a record with
+    the stage name, the time in seconds, the number of points, the points per
+    second and the bytes allocated. When no collector is active the stages
+    are not measured at all.
+
+    Attributes
+    ----------
+    records : list of dict
+        A record of every stage, in the order they ended
+    ----------
+    callback : callable, optional
+        Called with every record as soon as its stage ends, by default None
+    memory : bool, optional
+        Measures the peak memory allocated by each stage with tracemalloc,
+        which slows the stages down, by default False
+    progress : callable, optional
+        Called as progress(stage, done, total) while a long stage runs, with
+        done and total counted in points, by default None
+    interval : float, optional
+        Smallest number of seconds between two progress reports of a stage,
+        by default 1
+    """
+
+    def __init__(self, callback=None, memory=False, progress=None, interval=1.0):
+        self.callback = callback
+        self.memory = memory
+        self.progress = progress
+        self.interval = interval
+        self.records = []
+        self._tracing = False
+        self._reported = 0.0
+
+    def __enter__(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+
+        _collectors.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _collectors.remove(self)
+
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def _record(self, record):
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def _progress(self, name, done, total):
+        if self.progress is None:
+            return
+
+        now = time.perf_counter()
+        if done >= total or now - self._reported >= self.interval:
+            self._reported = now
+            self.progress(name, done, total)
+
+    def summary(self):
+        """Returns the totals of every stage.
+
+        Returns
+        -------
+        dict
+            The number of calls, seconds, points, points per second and
+            largest number of bytes allocated, for every stage name
+        """
+        totals = {}
+
+        for record in self.records:
+            total = totals.setdefault(
+                record["stage"], {"calls": 0, "seconds": 0.0, "points": 0, "bytes": 0}
+            )
+            total["calls"] += 1
+            total["seconds"] += record["seconds"]
+            total["points"] += record["points"]
+            total["bytes"] = max(total["bytes"], record["bytes"])
+
+        for total in totals.values():
+            total["points_per_sec"] = _rate(total["points"], total["seconds"])
+
+        return totals
+
+
+class _Stage:
+    """Measures one run of a stage, and passes the record to the collectors."""
+
+    def __init__(self, name, points):
+        self.name = name
+        self.points = points
+        self.peak = 0
+
+    def __enter__(self):
+        self.tracing = tracemalloc.is_tracing()
+        if self.tracing:
+            self.before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+
+        _stages.append(self)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        _stages.pop()
+
+        allocated = 0
+        if self.tracing and tracemalloc.is_tracing():
+            # Inner stages reset the peak, so their peaks are kept separately
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            allocated = max(0, self.peak - self.before)
+            if _stages:
+                _stages[-1].peak = max(_stages[-1].peak, self.peak)
+
+        record = {
+            "stage": self.name,
+            "seconds": seconds,
+            "points": self.points,
+            "points_per_sec": _rate(self.points, seconds),
+            "bytes": allocated,
+        }
+        for collector in list(_collectors):
+            collector._record(record)
+
+
+def _rate(points, seconds):
+    return points / seconds if seconds > 0 else 0.0
+
+
+def stage(name, points=0):
+    """Returns a context manager that measures a stage.
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage, such as "ChaosGame.iterate"
+    points : int, optional
+        Number of points produced by the stage, by default 0
+
+    Returns
+    -------
+    context manager
+        Measures the stage if a collector is active, and does nothing
+        otherwise
+    """
+    if not _collectors:
+        return _DISABLED
+
+    return _Stage(name, int(points))
+
+
+def progress(done, total):
+    """Reports the progress of the innermost running stage.
+
+    Parameters
+    ----------
+    done : int
+        Number of points produced so far
+    total : int
+        Number of points the stage produces
+    """
+    if not _collectors or not _stages:
+        return
+
+    for collector in _collectors:
+        collector._progress(_stages[-1].name, done, total)
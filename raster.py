@@ -0,0 +1,616 @@
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+# Above this number of points, plots are rasterized instead of scattered
+SCATTER_LIMIT = 100000
+
+
+def pyplot():
+    """Returns matplotlib.pyplot, importing it the first time it is needed.
+
+    Importing pyplot is slow, so it is only done once something is plotted.
+    Without a display the non-interactive Agg backend is selected first,
+    unless a backend is given by the MPLBACKEND environment variable.
+
+    Returns
+    -------
+    module
+        matplotlib.pyplot
+    """
+    if "matplotlib.pyplot" not in sys.modules and _headless():
+        import matplotlib
+
+        matplotlib.use("Agg")
+
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def _headless():
+    """Returns True if there is no display to show figures on."""
+    if os.environ.get("MPLBACKEND") or sys.platform in ("darwin", "win32"):
+        return False
+
+    return not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+# Colors resolved without importing matplotlib, with matplotlib's values
+COLORS = {
+    "b": (0.0, 0.0, 1.0),
+    "g": (0.0, 0.5, 0.0),
+    "r": (1.0, 0.0, 0.0),
+    "c": (0.0, 0.75, 0.75),
+    "m": (0.75, 0.0, 0.75),
+    "y": (0.75, 0.75, 0.0),
+    "k": (0.0, 0.0, 0.0),
+    "w": (1.0, 1.0, 1.0),
+    "black": "#000000",
+    "white": "#ffffff",
+    "red": "#ff0000",
+    "green": "#008000",
+    "blue": "#0000ff",
+    "cyan": "#00ffff",
+    "magenta": "#ff00ff",
+    "yellow": "#ffff00",
+    "gray": "#808080",
+    "grey": "#808080",
+    "orange": "#ffa500",
+    "purple": "#800080",
+}
+
+
+def _to_rgb(color):
+    """Returns a matplotlib color specification as RGB values.
+
+    RGB or RGBA tuples, hex strings and the names in COLORS are converted
+    directly. Only other colors, such as "C0" or "tab:blue", import matplotlib.
+    """
+    if not isinstance(color, str):
+        values = tuple(float(c) for c in color)
+        if len(values) in (3, 4) and all(0 <= c <= 1 for c in values):
+            return values[:3]
+        raise ValueError(f"invalid RGB color {color!r}")
+
+    text = COLORS.get(color if len(color) == 1 else color.lower(), color.lower())
+    if not isinstance(text, str):
+        return text
+    if text.startswith("#") and len(text) in (4, 7):
+        digits = text[1:] if len(text) == 7 else "".join(2 * c for c in text[1:])
+        try:
+            return tuple(int(digits[i : i + 2], 16) / 255 for i in (0, 2, 4))
+        except ValueError:
+            pass
+
+    from matplotlib.colors import to_rgb
+
+    return to_rgb(color)
+
+
+def colormap(cmap):
+    """Returns a colormap as a function from [0, 1] to RGBA.
+
+    Parameters
+    ----------
+    cmap : str or callable
+        Name of a matplotlib colormap, or the colormap itself
+
+    Returns
+    -------
+    callable
+        The colormap
+    """
+    if isinstance(cmap, str):
+        from matplotlib import colormaps
+
+        return colormaps[cmap]
+
+    return cmap
+
+
+def _accumulate(target, index, weights=None):
+    """Adds one, or a weight, to target for every flat pixel index.
+
+    Small blocks are added point by point, and large blocks are counted with
+    bincount, which costs one pass over all the pixels.
+
+    Parameters
+    ----------
+    target : ndarray (height, width) or (height, width, channels)
+        Contiguous array to add to
+    index : ndarray (m, ) of int
+        Flat pixel index of each point
+    weights : ndarray (m, ) or (m, channels), optional
+        Value added for each point, by default one
+    """
+    pixels = target.shape[0] * target.shape[1]
+    flat = target.reshape(pixels, -1)
+
+    if weights is not None:
+        weights = np.reshape(weights, (len(index), -1))
+
+    if len(index) < pixels // 8:
+        np.add.at(flat, index, 1 if weights is None else weights)
+        return
+
+    for channel in range(flat.shape[1]):
+        channel_weights = None if weights is None else weights[:, channel]
+        flat[:, channel] += np.bincount(
+            index, weights=channel_weights, minlength=pixels
+        ).astype(flat.dtype, copy=False)
+
+
+def to_bytes(image, background="white"):
+    """Converts an RGBA image with values between 0 and 1 to 8-bit values.
+
+    Parameters
+    ----------
+    image : ndarray (height, width, 4)
+        The image
+    background : color or None, optional
+        Color the image is drawn on top of, giving an RGB image. If None the
+        RGBA image is kept. By default "white".
+
+    Returns
+    -------
+    ndarray (height, width, 3 or 4) of uint8
+        The image
+    """
+    if background is None:
+        scaled = np.multiply(image, 255)
+    else:
+        # (rgb * alpha + background * (1 - alpha)) * 255
+        background = np.array(_to_rgb(background))
+        scaled = np.subtract(image[..., :3], background)
+        scaled *= image[..., 3:]
+        scaled += background
+        scaled *= 255
+
+    np.clip(scaled, 0, 255, out=scaled)
+    scaled += 0.5
+
+    return scaled.astype(np.uint8)
+
+
+class PNGWriter:
+    """Writes an 8-bit RGB or RGBA PNG file a block of rows at a time.
+
+    Only the compressed rows are kept in memory, so images of any height can
+    be written. Use as a context manager, or call close when all rows have
+    been written. If the body of the with statement raises, the unfinished
+    file is removed and the exception is passed on.
+
+    Parameters
+    ----------
+    path : str
+        Path of the output file
+    width, height : int
+        Size of the image in pixels
+    channels : int, optional
+        3 for RGB or 4 for RGBA, by default 3
+    level : int, optional
+        zlib compression level, by default 6
+    """
+
+    def __init__(self, path, width, height, channels=3, level=6):
+        if channels not in (3, 4):
+            raise ValueError("channels must be 3 for RGB or 4 for RGBA")
+
+        self.width, self.height, self.channels = width, height, channels
+        self.rows = 0
+        self._compressor = zlib.compressobj(level)
+        self._file = open(path, "wb")
+
+        color_type = 2 if channels == 3 else 6
+        self._file.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(
+            b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        if kind is None:
+            self.close()
+            return
+
+        self._file.close()
+        os.remove(self._file.name)
+
+    def _chunk(self, kind, data):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(kind + data)
+        self._file.write(struct.pack(">I", zlib.crc32(kind + data)))
+
+    def write_rows(self, rows):
+        """Adds rows to the image, from the top.
+
+        Parameters
+        ----------
+        rows : ndarray (m, width, channels) of uint8
+            The next rows of the image
+        """
+        rows = np.asarray(rows, dtype=np.uint8)
+        if rows.shape[1:] != (self.width, self.channels):
+            raise ValueError("rows must have shape (m, width, channels)")
+        if self.rows + rows.shape[0] > self.height:
+            raise ValueError("more rows than the height of the image")
+
+        # Every row starts with the filter type, 0 for no filter
+        scanlines = np.zeros(
+            shape=(rows.shape[0], 1 + self.width * self.channels), dtype=np.uint8
+        )
+        scanlines[:, 1:] = rows.reshape(rows.shape[0], -1)
+
+        data = self._compressor.compress(scanlines.tobytes())
+        if data:
+            self._chunk(b"IDAT", data)
+        self.rows += rows.shape[0]
+
+    def close(self):
+        """Finishes the file."""
+        if self._file.closed:
+            return
+
+        try:
+            if self.rows != self.height:
+                raise ValueError(f"wrote {self.rows} of {self.height} rows")
+
+            self._chunk(b"IDAT", self._compressor.flush())
+            self._chunk(b"IEND", b"")
+        finally:
+            self._file.close()
+
+
+def write_png(path, image, background="white"):
+    """Writes an image to a PNG file without going through matplotlib.
+
+    Parameters
+    ----------
+    path : str
+        Path of the output file
+    image : ndarray (height, width, 4)
+        RGBA image with values between 0 and 1, or (height, width, 3 or 4)
+        of uint8
+    background : color or None, optional
+        Color the image is drawn on top of. If None the transparency is kept.
+        By default "white".
+    """
+    if image.dtype != np.uint8:
+        image = to_bytes(image, background)
+
+    height, width, channels = image.shape
+    with PNGWriter(path, width, height, channels) as png:
+        png.write_rows(image)
+
+
+class Histogram:
+    """A density image that points are accumulated into.
+
+    Counts how many points fall into each pixel, and sums up the color values
+    of those points, so that the cost of drawing only depends on the number
+    of pixels. Points can be added in as many blocks as needed.
+
+    Attributes
+    ----------
+    extent : tuple of float
+        The area covered, as (xmin, xmax, ymin, ymax)
+    counts : ndarray (height, width) of int
+        Number of points in each pixel, with the first row at ymin
+    sums : ndarray (height, width) or (height, width, channels), or None
+        Sum of the color values of the points in each pixel
+    ----------
+    extent : tuple of float
+        The area covered, as (xmin, xmax, ymin, ymax)
+    resolution : int or tuple of int, optional
+        Number of pixels as width or (width, height), by default 1024
+    """
+
+    def __init__(self, extent, resolution=1024):
+        if np.ndim(resolution) == 0:
+            resolution = (resolution, resolution)
+
+        xmin, xmax, ymin, ymax = extent
+        if not (xmax > xmin and ymax > ymin):
+            raise ValueError("extent must be given as (xmin, xmax, ymin, ymax)")
+
+        self.extent = (float(xmin), float(xmax), float(ymin), float(ymax))
+        self.width, self.height = int(resolution[0]), int(resolution[1])
+        self.counts = np.zeros(shape=(self.height, self.width), dtype=np.int64)
+        self.sums = None
+
+    @property
+    def total(self):
+        """Number of points that have landed inside the image."""
+        return int(self.counts.sum())
+
+    def _pixels(self, points):
+        """Returns the flat pixel index of each point, and which points are inside.
+
+        Parameters
+        ----------
+        points : ndarray (m, 2)
+            Coordinates of the points
+
+        Returns
+        -------
+        index : ndarray (k, ) of int
+            Flat pixel index of the points that are inside the image
+        inside : ndarray (m, ) of bool
+            Which points are inside the image
+        """
+        xmin, xmax, ymin, ymax = self.extent
+
+        col = np.floor((points[:, 0] - xmin) * (self.width / (xmax - xmin)))
+        row = np.floor((points[:, 1] - ymin) * (self.height / (ymax - ymin)))
+
+        # Points exactly on the upper edges belong to the last pixel
+        col[points[:, 0] == xmax] = self.width - 1
+        row[points[:, 1] == ymax] = self.height - 1
+
+        inside = (col >= 0) & (col < self.width) & (row >= 0) & (row < self.height)
+        index = row[inside].astype(np.int64) * self.width + col[inside].astype(np.int64)
+
+        return index, inside
+
+    def add(self, points, values=None):
+        """Adds a block of points to the image.
+
+        Parameters
+        ----------
+        points : ndarray (m, 2)
+            Coordinates of the points
+        values : ndarray (m, ) or (m, channels), optional
+            Color value of each point, by default no color values
+        """
+        points = np.asarray(points)
+        index, inside = self._pixels(points)
+
+        _accumulate(self.counts, index)
+
+        if values is None:
+            return
+
+        values = np.asarray(values, dtype=float)[inside]
+        if self.sums is None:
+            self.sums = np.zeros(shape=self.counts.shape + values.shape[1:])
+
+        _accumulate(self.sums, index, values)
+
+    def merge(self, other):
+        """Adds the counts and color sums of another histogram to this one.
+
+        Parameters
+        ----------
+        other : Histogram
+            Histogram with the same extent and resolution
+        """
+        if other.extent != self.extent or other.counts.shape != self.counts.shape:
+            raise ValueError("histograms must have the same extent and resolution")
+
+        self.counts += other.counts
+        if other.sums is not None:
+            if self.sums is None:
+                self.sums = np.zeros_like(other.sums)
+            self.sums += other.sums
+
+    def downsample(self, factor):
+        """Returns a histogram with factor times fewer pixels along each side.
+
+        Adds up the counts and color sums of each factor x factor block of
+        pixels, which works as a box filter for supersampled histograms.
+
+        Parameters
+        ----------
+        factor : int
+            Number of pixels along each side of a block
+
+        Returns
+        -------
+        Histogram
+            The downsampled histogram
+        """
+        if self.width % factor or self.height % factor:
+            raise ValueError("the resolution must be divisible by the factor")
+
+        width, height = self.width // factor, self.height // factor
+        smaller = Histogram(self.extent, (width, height))
+
+        def blocks(array):
+            shape = (height, factor, width, factor) + array.shape[2:]
+            return array.reshape(shape).sum(axis=(1, 3))
+
+        smaller.counts = blocks(self.counts)
+        if self.sums is not None:
+            smaller.sums = blocks(self.sums)
+
+        return smaller
+
+    def density(self, log=True, gamma=1, peak=None):
+        """Returns the tone mapped density, between 0 and 1.
+
+        Parameters
+        ----------
+        log : bool, optional
+            Uses log(1 + count) if True, and the count itself if False
+            , by default True
+        gamma : float, optional
+            Raises the density to the power 1 / gamma, by default 1
+        peak : int, optional
+            Count that gives a density of one, by default the largest count
+
+        Returns
+        -------
+        ndarray (height, width)
+            The density, with the first row at ymin
+        """
+        top = float(self.counts.max() if peak is None else peak)
+        counts = self.counts.astype(float)
+        if log:
+            counts = np.log1p(counts)
+            top = np.log1p(top)
+
+        if top > 0:
+            counts /= top
+        if gamma != 1:
+            np.power(counts, 1 / gamma, out=counts)
+
+        return counts
+
+    def image(
+        self,
+        color="black",
+        cmap="jet",
+        log=True,
+        vmin=None,
+        vmax=None,
+        gamma=1,
+        peak=None,
+    ):
+        """Returns the histogram as an RGBA image.
+
+        The density gives the opacity of each pixel. Pixels are colored by the
+        mean color value of their points through the colormap, by the mean
+        RGB value if the points have three color channels, or by a single
+        color if the points have no color values.
+
+        Parameters
+        ----------
+        color : color, optional
+            Color used when the points have no color values, by default "black"
+        cmap : str or callable, optional
+            Colormap for scalar color values, by default "jet"
+        log : bool, optional
+            Uses a log-density tone mapping, by default True
+        vmin, vmax : float, optional
+            Color values mapped to the ends of the colormap, by default the
+            smallest and largest mean color value
+        gamma : float, optional
+            Gamma correction of the density, by default 1
+        peak : int, optional
+            Count that gives full opacity, by default the largest count
+
+        Returns
+        -------
+        ndarray (height, width, 4)
+            The image, with the first row at ymax
+        """
+        rgba = np.zeros(shape=self.counts.shape + (4,))
+
+        if self.sums is None:
+            rgba[..., :3] = _to_rgb(color)
+        else:
+            counts = np.maximum(self.counts, 1)
+            mean = self.sums / (counts[..., None] if self.sums.ndim == 3 else counts)
+
+            if mean.ndim == 3:
+                rgba[..., :3] = np.clip(mean, 0, 1)
+            else:
+                filled = mean[self.counts > 0]
+                if vmin is None:
+                    vmin = filled.min() if filled.size else 0
+                if vmax is None:
+                    vmax = filled.max() if filled.size else 1
+
+                normed = (mean - vmin) / (vmax - vmin) if vmax > vmin else 0 * mean
+                rgba[..., :3] = colormap(cmap)(np.clip(normed, 0, 1))[..., :3]
+
+        rgba[..., 3] = self.density(log=log, gamma=gamma, peak=peak)
+
+        return rgba[::-1]
+
+    def save_png(self, path, background="white", **kwargs):
+        """Writes the image to a PNG file with one file pixel per histogram pixel.
+
+        Takes the same keyword arguments as image.
+
+        Parameters
+        ----------
+        path : str
+            Path of the output file
+        background : color or None, optional
+            Color the image is drawn on top of. If None the transparency is
+            kept. By default "white".
+        """
+        write_png(path, self.image(**kwargs), background=background)
+
+    def plot(self, color="black", cmap="jet", log=True, vmin=None, vmax=None, gamma=1):
+        """Draws the image with matplotlib.
+
+        Takes the same parameters as image.
+        """
+        pyplot().imshow(
+            self.image(color, cmap, log=log, vmin=vmin, vmax=vmax, gamma=gamma),
+            extent=self.extent,
+            interpolation="nearest",
+        )
+
+
+def fit_resolution(extent, width):
+    """Returns the resolution with the given width and the aspect of the extent.
+
+    Parameters
+    ----------
+    extent : tuple of float
+        The area covered, as (xmin, xmax, ymin, ymax)
+    width : int
+        Number of pixels along x
+
+    Returns
+    -------
+    tuple of int
+        The resolution as (width, height)
+    """
+    xmin, xmax, ymin, ymax = extent
+
+    return width, max(1, int(round(width * (ymax - ymin) / (xmax - xmin))))
+
+
+def plot_points(
+    points, values=None, s=1, color="black", cmap="jet", extent=None, resolution=None
+):
+    """Plots points as a scatter plot, or as a density image if there are many.
+
+    Parameters
+    ----------
+    points : ndarray (m, 2)
+        Coordinates of the points
+    values : ndarray (m, ) or (m, 3), optional
+        Color value of each point, by default all points get the same color
+    s : float, optional
+        Size of the points in a scatter plot, by default 1
+    color : color, optional
+        Color of the points if they have no color values, by default "black"
+    cmap : str, optional
+        Colormap for scalar color values, by default "jet"
+    extent : tuple of float, optional
+        Area of the density image, by default the bounding box of the points
+    resolution : int, optional
+        Width of the density image. By default the points are scattered if
+        there are at most SCATTER_LIMIT of them, and otherwise drawn as a
+        1024 pixels wide image.
+    """
+    points = np.asarray(points)
+    plt = pyplot()
+
+    if resolution is None and len(points) <= SCATTER_LIMIT:
+        if values is None:
+            plt.scatter(points[:, 0], points[:, 1], s=s, color=color)
+        elif np.ndim(values) == 2:
+            plt.scatter(points[:, 0], points[:, 1], s=s, color=values)
+        else:
+            plt.scatter(points[:, 0], points[:, 1], s=s, c=values, cmap=cmap)
+        return
+
+    if extent is None:
+        (xmin, ymin), (xmax, ymax) = points.min(axis=0), points.max(axis=0)
+        extent = (xmin, max(xmax, xmin + 1e-9), ymin, max(ymax, ymin + 1e-9))
+
+    histogram = Histogram(extent, fit_resolution(extent, resolution or 1024))
+    histogram.add(points, values)
+    histogram.plot(color=color, cmap=cmap)
@@ -0,0 +1,205 @@
+import numpy as np
+
+
+class Exclude:
+    """A corner rule that never picks the corners at some offsets from the last.
+
+    Offset 0 is the last corner itself, and offsets 1 and -1 are its
+    neighbours around the ngon. All the other corners are equally likely.
+
+    Parameters
+    ----------
+    *offsets : int
+        Offsets of the corners that are never picked
+    """
+
+    def __init__(self, *offsets):
+        self.offsets = offsets
+
+    def matrix(self, n):
+        """Returns the transition matrix of the rule for an ngon.
+
+        Parameters
+        ----------
+        n : int
+            Number of corners
+
+        Returns
+        -------
+        ndarray (n, n)
+            Probability of picking corner j after corner i, in row i
+        """
+        allowed = np.ones(shape=(n, n))
+        corner = np.arange(n)
+        for offset in self.offsets:
+            allowed[corner, (corner + offset) % n] = 0
+
+        if not allowed.any(axis=1).all():
+            raise ValueError("the rule excludes every corner")
+
+        return allowed / allowed.sum(axis=1, keepdims=True)
+
+
+# Never picks the same corner twice in a row
+NO_REPEAT = Exclude(0)
+
+# Never picks a neighbour of the last corner
+NOT_NEIGHBOUR = Exclude(-1, 1)
+
+
+def transition_matrix(rule, n):
+    """Returns the transition matrix of a rule, with rows summing to one.
+
+    Parameters
+    ----------
+    rule : array_like (n, n) or rule object
+        A matrix whose row i gives the weights of the corners after corner
+        i, or an object with a matrix(n) method, such as Exclude
+    n : int
+        Number of corners
+
+    Returns
+    -------
+    ndarray (n, n)
+        The transition matrix
+    """
+    if hasattr(rule, "matrix"):
+        rule = rule.matrix(n)
+    matrix = np.array(rule, dtype=float)
+
+    if matrix.shape != (n, n):
+        raise ValueError(f"the transition matrix must have shape ({n}, {n})")
+    if np.any(matrix < 0) or not np.all(matrix.sum(axis=1) > 0):
+        raise ValueError("every row must be non-negative and not all zero")
+
+    return matrix / matrix.sum(axis=1, keepdims=True)
+
+
+def _walk(tables, previous):
+    """Follows lookup tables from a corner, with the walkers in parallel.
+
+    The steps are split into blocks of equal width. The tables of every
+    block are first composed into a table from the corner before the block
+    to its last corner, all blocks at once, and these are composed with a
+    Hillis-Steele scan to find the corner before every block. The corners
+    inside all blocks are then looked up side by side, so the number of
+    Python iterations only depends on the width.
+
+    Parameters
+    ----------
+    tables : ndarray (walkers, blocks, width, n)
+        tables[w, k, t, i] is the corner picked at step t of block k after
+        corner i
+    previous : ndarray (walkers, )
+        The corner before the first block
+
+    Returns
+    -------
+    ndarray (walkers, blocks, width)
+        The picked corners
+    """
+    walkers, blocks, width, n = tables.shape
+    flat = tables.reshape(-1)
+    # Index of tables[w, k, 0, 0]
+    base = np.arange(walkers * blocks).reshape(walkers, blocks) * (width * n)
+
+    totals = np.broadcast_to(np.arange(n), (walkers, blocks, n))
+    for t in range(width):
+        totals = flat[base[..., None] + t * n + totals]
+
+    shift, index = 1, np.arange(walkers * blocks).reshape(walkers, blocks, 1) * n
+    totals = totals.reshape(-1)
+    while shift < blocks:
+        later = totals.reshape(walkers, blocks, n)[:, shift:]
+        earlier = totals.reshape(walkers, blocks, n)[:, :-shift]
+        later[...] = totals[index[:, shift:] + earlier]
+        shift *= 2
+
+    state = np.empty(shape=(walkers, blocks), dtype=np.intp)
+    state[:, 0] = previous
+    state[:, 1:] = totals.reshape(walkers, blocks, n)[
+        np.arange(walkers)[:, None], np.arange(blocks - 1), previous[:, None]
+    ]
+
+    corners = np.empty(shape=(walkers, blocks, width), dtype=tables.dtype)
+    for t in range(width):
+        state = flat[base + t * n + state]
+        corners[..., t] = state
+
+    return corners
+
+
+def markov_chain(
+    matrix, previous, steps, rng, dtype=np.int64, width=256, block=2 ** 24
+):
+    """Picks a sequence of corners, each from the row of the previous corner.
+
+    All the uniform random numbers are drawn at once. If every row is the
+    first row shifted around the ngon, as for Exclude, the steps around the
+    ngon are independent and the corners are their cumulative sum. Otherwise
+    every random number gives a lookup table from the previous corner to the
+    next one, for all corners at once, and the tables are followed by _walk.
+
+    Parameters
+    ----------
+    matrix : ndarray (n, n)
+        The transition matrix
+    previous : ndarray (...)
+        The corner before the first step of each walker
+    steps : int
+        Number of corners picked for each walker
+    rng : Generator
+        Random number generator
+    dtype : dtype, optional
+        Type of the corners, by default int64
+    width : int, optional
+        Number of steps in each block of _walk, by default 256
+    block : int, optional
+        Largest number of lookup table entries made at once, by default 2**24
+
+    Returns
+    -------
+    ndarray (..., steps)
+        The picked corners
+    """
+    n = len(matrix)
+    previous = np.asarray(previous, dtype=np.intp)
+    u = rng.random(previous.shape + (steps,))
+    cumulative = np.cumsum(matrix, axis=1)
+
+    corner = np.arange(n)
+    shifts = (corner[None, :] - corner[:, None]) % n
+    if np.allclose(matrix, matrix[0][shifts]):
+        # Scaling by the total keeps zero-probability offsets at the end out
+        offsets = np.searchsorted(cumulative[0], u * cumulative[0, -1], side="right")
+        corners = np.cumsum(offsets, axis=-1)
+        corners += previous[..., None]
+        corners %= n
+
+        return corners.astype(dtype)
+
+    u = u.reshape(-1, steps)
+    walkers = len(u)
+    corners = np.empty(shape=u.shape, dtype=dtype)
+    state = previous.reshape(-1)
+    size = width * max(1, block // (width * n * walkers))
+
+    for lo in range(0, steps, size):
+        chunk = u[:, lo : lo + size]
+        blocks = -(-chunk.shape[1] // width)
+        chunk = np.pad(chunk, [(0, 0), (0, blocks * width - chunk.shape[1])])
+
+        tables = np.stack(
+            [
+                np.searchsorted(row, chunk * row[-1], side="right").astype(dtype)
+                for row in cumulative
+            ],
+            axis=-1,
+        )
+        picked = _walk(tables.reshape(walkers, blocks, width, n), state)
+        picked = picked.reshape(walkers, -1)[:, : min(size, steps - lo)]
+
+        corners[:, lo : lo + size] = picked
+        state = picked[:, -1].astype(np.intp)
+
+    return corners.reshape(previous.shape + (steps,))
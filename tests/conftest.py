@@ -0,0 +1,30 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark", action="store_true", help="run the benchmarks as well"
+    )
+    parser.addoption("--benchmark-baseline", help="JSON file of earlier results")
+    parser.addoption(
+        "--benchmark-threshold",
+        type=float,
+        default=0.25,
+        help="allowed relative change from the baseline",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: slow performance test, only run with --benchmark"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+
+    skip = pytest.mark.skip(reason="needs --benchmark to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,40 @@
+from batch import load_manifest, main
+import json
+import os
+import pytest
+
+
+def test_manifest_jobs_are_rendered_once(tmp_path, capsys):
+    """
+    Tests that every job of a manifest is written to its output, and that
+    jobs whose outputs are newer than the manifest are skipped.
+    """
+    manifest = tmp_path / "jobs.json"
+    jobs = [
+        {"kind": "ngon", "n": 3, "r": 0.5, "steps": 5000, "seed": 1,
+         "resolution": 32, "color": True, "output": "out/triangle.png"},
+        {"kind": "fern", "steps": 5000, "resolution": 32, "output": "fern.png"},
+        {"kind": "variations", "n": 4, "r": 0.3, "steps": 2000,
+         "variations": ["swirl", "disc"], "coefficients": [1, 1],
+         "resolution": 32, "output": "swirl.png"},
+    ]
+    manifest.write_text(json.dumps({"jobs": jobs}))
+
+    assert main([str(manifest), "--workers", "2"]) == 0
+    for path in ("out/triangle.png", "fern.png", "swirl.png"):
+        assert os.path.exists(tmp_path / path)
+    assert capsys.readouterr().out.count("rendered") == 3
+
+    assert main([str(manifest), "--workers", "2"]) == 0
+    assert capsys.readouterr().out.count("up to date") == 3
+
+
+def test_invalid_job(tmp_path):
+    """
+    Tests that a job of unknown kind is rejected when the manifest is read.
+    """
+    manifest = tmp_path / "jobs.toml"
+    manifest.write_text('[[jobs]]\nkind = "circle"\noutput = "circle.png"\n')
+
+    with pytest.raises(ValueError):
+        load_manifest(str(manifest))
@@ -0,0 +1,43 @@
+from benchmark import CASES, compare, run
+import json
+import pytest
+
+
+def test_compare_finds_regressions():
+    """
+    Tests that only results that are slower or use more memory than the
+    threshold allows are reported.
+    """
+    baseline = [
+        {"case": "a", "points": 10, "points_per_sec": 100.0, "peak_bytes": 1000},
+        {"case": "b", "points": 10, "points_per_sec": 100.0, "peak_bytes": 1000},
+    ]
+    results = [
+        {"case": "a", "points": 10, "points_per_sec": 80.0, "peak_bytes": 1200},
+        {"case": "b", "points": 10, "points_per_sec": 60.0, "peak_bytes": 1300},
+        {"case": "c", "points": 10, "points_per_sec": 1.0, "peak_bytes": 10 ** 9},
+    ]
+
+    regressions = compare(results, baseline, threshold=0.25)
+
+    assert len(regressions) == 2
+    assert all(regression.startswith("b with 10 points") for regression in regressions)
+
+
+@pytest.mark.benchmark
+def test_benchmark(request):
+    """
+    Runs every case for small point counts, and compares the results with
+    the baseline given by --benchmark-baseline.
+    """
+    results = run(counts=[10 ** 4, 10 ** 5], repeat=1)
+
+    assert len(results) == 2 * len(CASES)
+    assert all(result["points_per_sec"] > 0 for result in results)
+
+    path = request.config.getoption("--benchmark-baseline")
+    if path is not None:
+        with open(path) as file:
+            baseline = json.load(file)
+        threshold = request.config.getoption("--benchmark-threshold")
+        assert compare(results, baseline, threshold) == []
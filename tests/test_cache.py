@@ -0,0 +1,67 @@
+from cache import RenderCache
+from chaos_game import ChaosGame
+import numpy as np
+import os
+
+
+def test_hit_and_top_up(tmp_path):
+    """
+    Tests that a repeated request is answered from the cache, and that a
+    request for more points only adds the missing points to the entry.
+    """
+    cache = RenderCache(str(tmp_path))
+
+    first = cache.render("ngon", 5000, seed=3, resolution=32, n=3, r=0.5)
+    again = cache.render("ngon", 4000, seed=3, resolution=32, n=3, r=0.5)
+
+    assert cache.hits == 1
+    assert np.array_equal(again.counts, first.counts)
+
+    more = cache.render("ngon", 8000, seed=3, resolution=32, n=3, r=0.5)
+    assert more.total == 8000
+    assert np.all(more.counts >= first.counts)
+
+    # The top-up continues the same game as an uninterrupted render would
+    game = ChaosGame(3, 0.5, rng=3)
+    game.accumulate(5000, resolution=32)
+    game.accumulate(3000)
+    assert np.array_equal(more.counts, game.histogram.counts)
+
+
+def test_key_includes_variations(tmp_path):
+    """
+    Tests that different variation coefficients are stored as different
+    entries, and that the same ones are found again.
+    """
+    cache = RenderCache(str(tmp_path))
+    kwargs = dict(resolution=16, variations=["swirl", "disc"])
+
+    cache.render("fern", 2000, coefficients=[1, 1], **kwargs)
+    cache.render("fern", 2000, coefficients=[1, 2], **kwargs)
+    cache.render("fern", 2000, coefficients=[1.0, 1.0], **kwargs)
+
+    assert cache.hits == 1
+    assert len(os.listdir(tmp_path)) == 4
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    """
+    Tests that the entries that were used the longest time ago are removed
+    when the cache is full.
+    """
+    cache = RenderCache(str(tmp_path))
+    for seed in range(3):
+        cache.render("ngon", 1000, seed=seed, resolution=64, n=4, r=0.3)
+    size = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+
+    # Use the first entry again, so that the second is the oldest
+    cache.render("ngon", 1000, seed=0, resolution=64, n=4, r=0.3)
+    cache.max_bytes = size + 100
+    cache.render("ngon", 1000, seed=3, resolution=64, n=4, r=0.3)
+
+    cache.hits = 0
+    for seed in (0, 3, 2):
+        cache.render("ngon", 1000, seed=seed, resolution=64, n=4, r=0.3)
+    assert cache.hits == 3
+    cache.render("ngon", 1000, seed=1, resolution=64, n=4, r=0.3)
+    assert cache.hits == 3
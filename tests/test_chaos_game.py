@@ -1,4 +1,7 @@
-from chaos_game import ChaosGame
+from chaos_game import ChaosGame, color_gradient, linear_recurrence
+from raster import Histogram
+from rules import NO_REPEAT
+import numpy as np
 import pytest
 
 
@@ -42,5 +45,318 @@ def test_file_is_png():
         game.savepng("filename.jpeg")
 
 
+@pytest.mark.parametrize("r", [1 / 2, 1 / 3, 3 / 8, 0.01, 0.99])
+def test_linear_recurrence_matches_loop(r):
+    """
+    Tests that the vectorized recurrence gives the same points as stepping
+    through the chaos game one point at a time.
+    """
+    game = ChaosGame(5, r)
+    corner_list = np.random.randint(game.n, size=3000)
+
+    expected = np.zeros(shape=(corner_list.size, 2))
+    point = game.st_point
+    for i, corner in enumerate(corner_list):
+        point = r * point + (1 - r) * game.corners[corner]
+        expected[i] = point
+
+    points = linear_recurrence(game.st_point, game.corners[corner_list], r)
+
+    assert np.allclose(points, expected, rtol=0, atol=1e-12)
+
+
+def test_iterate_discards_first_points():
+    """
+    Tests that iterate stores steps - discard points, corners and colors.
+    """
+    game = ChaosGame(4, 1 / 3)
+    game.iterate(1000, discard=10)
+
+    assert game.points.shape == (990, 2)
+    assert game.corner_list.shape == (990,)
+    assert game.colors.shape == (990,)
+
+
+def test_walkers_stay_inside_ngon():
+    """
+    Tests that every walker of an ensemble run gives points inside the ngon,
+    and that the colors restart for each walker.
+    """
+    game = ChaosGame(3, 1 / 2)
+    game.iterate(4000, discard=5, walkers=8)
+
+    assert game.points.shape == (8 * 495, 2)
+    assert np.all(np.linalg.norm(game.points, axis=1) <= 1 + 1e-12)
+
+    first = game.corner_list.reshape(8, -1)[:, 0]
+    assert np.allclose(game.colors.reshape(8, -1)[:, 0], first / 2)
+
+
+def test_iter_chunks_continues_iterate():
+    """
+    Tests that the blocks from iter_chunks join up, so that every point,
+    also across blocks, is a step towards a corner from the previous point.
+    """
+    game = ChaosGame(5, 3 / 8)
+    chunks = list(game.iter_chunks(1000, chunk_size=300))
+
+    points = np.concatenate([p for p, _ in chunks])
+    colors = np.concatenate([c for _, c in chunks])
+
+    assert [len(p) for p, _ in chunks] == [300, 300, 300, 100]
+
+    targets = (points[1:] - game.r * points[:-1]) / (1 - game.r)
+    distance = np.linalg.norm(targets[:, None] - game.corners[None], axis=2)
+    assert np.allclose(distance.min(axis=1), 0, atol=1e-9)
+
+    corner_list = 2 * colors[1:] - colors[:-1]
+    assert np.allclose(corner_list, np.round(corner_list), atol=1e-9)
+
+
+def test_color_gradient_matches_loop():
+    """
+    Tests that the scalar and RGB color gradients match the recurrence
+    color[i] = (color[i - 1] + c_i) / 2 computed one point at a time.
+    """
+    corner_list = np.random.randint(3, size=500)
+    rgb = np.eye(3)
+
+    scalar = np.zeros(shape=(500,))
+    colors = np.zeros(shape=(500, 3))
+    previous_scalar, previous_rgb = 0, rgb[corner_list[0]]
+    for i, corner in enumerate(corner_list):
+        previous_scalar = (previous_scalar + corner) / 2
+        previous_rgb = (previous_rgb + rgb[corner]) / 2
+        scalar[i], colors[i] = previous_scalar, previous_rgb
+
+    assert np.allclose(color_gradient(corner_list), scalar)
+    assert np.allclose(
+        color_gradient(corner_list, rgb, start=rgb[corner_list[0]]), colors
+    )
+
+
+@pytest.mark.parametrize("n, corner_dtype", [(5, np.uint8), (300, np.uint16)])
+def test_compact_dtypes(n, corner_dtype):
+    """
+    Tests that the corner indexes use the smallest unsigned integer type, and
+    that float32 points and colors match float64 ones.
+    """
+    game = ChaosGame(n, 1 / 3, dtype=np.float32, rng=5)
+    reference = ChaosGame(n, 1 / 3, rng=5)
+
+    game.iterate(2000)
+    reference.iterate(2000)
+
+    assert game.corner_list.dtype == corner_dtype
+    assert game.points.dtype == game.colors.dtype == np.float32
+    assert np.allclose(game.points, reference.points, atol=1e-6)
+    assert np.allclose(game.colors, reference.colors, atol=1e-4)
+
+
+def test_same_seed_gives_same_points():
+    """
+    Tests that a seeded generator makes iterate reproducible bit for bit, and
+    that a generator passed to iterate is used instead of the game's own.
+    """
+    first = ChaosGame(4, 1 / 3, rng=11)
+    second = ChaosGame(4, 1 / 3, rng=11)
+    first.iterate(1000, walkers=4)
+    second.iterate(1000, walkers=4)
+
+    assert np.array_equal(first.points, second.points)
+    assert np.array_equal(first.corner_list, second.corner_list)
+
+    points = first.points
+    first.iterate(1000, walkers=4, rng=np.random.default_rng(12))
+    second.iterate(1000, walkers=4, rng=12)
+
+    assert np.array_equal(first.points, second.points)
+    assert not np.array_equal(first.points, points)
+
+    first.accumulate(1000, resolution=16, rng=13)
+    second.accumulate(1000, resolution=16, rng=13)
+    assert np.array_equal(first.histogram.counts, second.histogram.counts)
+
+    first.converge(16, rng=14, chunk_size=1024)
+    second.converge(16, rng=14, chunk_size=1024)
+    assert np.array_equal(first.histogram.counts, second.histogram.counts)
+
+
+def test_append_continues_walkers():
+    """
+    Tests that iterate with append continues every walker from its last
+    point and color, and keeps the earlier points.
+    """
+    game = ChaosGame(5, 1 / 3, rng=3)
+    game.iterate(600, walkers=3)
+    points, colors = game.points.copy(), game.colors.copy()
+    last_point, last_color = game.last_point, game.last_color
+
+    game.iterate(300, append=True)
+    new = slice(len(points), None)
+    first = game.corner_list[new].reshape(3, -1)[:, 0]
+
+    assert len(game.points) == len(game.colors) == len(points) + 300
+    assert np.array_equal(game.points[: len(points)], points)
+    assert np.array_equal(game.colors[: len(colors)], colors)
+    assert np.allclose(
+        game.points[new].reshape(3, -1, 2)[:, 0],
+        last_point / 3 + 2 / 3 * game.corners[first],
+    )
+    assert np.allclose(
+        game.colors[new].reshape(3, -1)[:, 0], (last_color + first) / 2
+    )
+
+
+def test_checkpoint_resumes_render(tmp_path):
+    """
+    Tests that a render saved to a checkpoint and loaded again continues
+    exactly like the render that was not interrupted.
+    """
+    game = ChaosGame(4, 1 / 3, rng=9)
+    game.accumulate(5000, resolution=32, chunk_size=1000)
+    game.save(tmp_path / "game.npz")
+
+    loaded = ChaosGame.load(tmp_path / "game.npz")
+    assert np.array_equal(loaded.histogram.counts, game.histogram.counts)
+
+    game.accumulate(3000, chunk_size=1000)
+    loaded.accumulate(3000, chunk_size=1000)
+
+    assert game.histogram.total == 8000
+    assert np.array_equal(loaded.histogram.counts, game.histogram.counts)
+    assert np.array_equal(loaded.histogram.sums, game.histogram.sums)
+
+
+def test_append_after_load(tmp_path):
+    """
+    Tests that a loaded game continues with iterate(append=True) exactly like
+    the game that was saved.
+    """
+    game = ChaosGame(4, 1 / 3, rng=9)
+    game.iterate(1000, walkers=2)
+    game.save(tmp_path / "game.npz")
+
+    loaded = ChaosGame.load(tmp_path / "game.npz")
+    loaded.iterate(100, append=True)
+    game.iterate(100, append=True)
+
+    assert len(loaded.points) == len(loaded.colors) == len(loaded.corner_list) == 100
+    assert np.array_equal(loaded.points, game.points[-100:])
+    assert np.array_equal(loaded.colors, game.colors[-100:])
+
+
+def test_zoom_matches_full_figure():
+    """
+    Tests that zooming gives the same density and colors in the viewport as
+    generating the whole figure, and keeps the number of points in the
+    viewport at any zoom level.
+    """
+    viewport = (0.1, 0.2, -0.4, -0.3)
+    game = ChaosGame(3, 1 / 2, rng=1)
+    game.zoom(viewport, 200000)
+
+    xmin, xmax, ymin, ymax = viewport
+    assert np.all((game.points[:, 0] >= xmin) & (game.points[:, 0] <= xmax))
+    assert np.all((game.points[:, 1] >= ymin) & (game.points[:, 1] <= ymax))
+
+    reference = ChaosGame(3, 1 / 2, rng=2)
+    reference.iterate(5 * 10 ** 6)
+
+    zoomed, full = Histogram(viewport, 16), Histogram(viewport, 16)
+    zoomed.add(game.points, game.colors)
+    full.add(reference.points, reference.colors)
+
+    assert np.corrcoef(zoomed.counts.ravel(), full.counts.ravel())[0, 1] > 0.95
+    both = (zoomed.counts > 0) & (full.counts > 0)
+    assert np.allclose(
+        zoomed.sums[both] / zoomed.counts[both],
+        full.sums[both] / full.counts[both],
+        atol=1e-3,
+    )
+
+    inside = len(game.points)
+    game.zoom((0.1, 0.1001, -0.4, -0.3999), 200000)
+    assert 0.5 < len(game.points) / inside < 2
+
+    with pytest.raises(ValueError, match="no previous iteration"):
+        game.iterate(100, append=True)
+
+
+def test_zoom_outside_figure():
+    """
+    Tests that a viewport that does not meet the figure is rejected.
+    """
+    with pytest.raises(ValueError):
+        ChaosGame(4, 1 / 3).zoom((5, 6, 5, 6), 1000)
+
+
+@pytest.mark.parametrize("r", [1 / 3, 1 / 2, 0.9])
+def test_burn_in_reaches_tolerance(r):
+    """
+    Tests that the burn-in shrinks the distance from the starting point to
+    the figure below the tolerance, and no further.
+    """
+    game = ChaosGame(4, r)
+    discard = game.burn_in(resolution=100, tolerance=0.5)
+
+    xmin, xmax, ymin, ymax = game.extent
+    size = np.hypot(xmax - xmin, ymax - ymin)
+    pixel = (xmax - xmin) / 100
+
+    assert r ** discard * size <= 0.5 * pixel < r ** (discard - 1) * size
+
+
+@pytest.mark.parametrize("metric", ["l1", "new_pixels"])
+def test_converge_stops_and_reports_samples(metric):
+    """
+    Tests that converge stops before the largest number of points, with all
+    the generated points in the histogram, that a stricter threshold needs
+    more points, and that the chunk size does not change the stopping point.
+    """
+    game = ChaosGame(3, 1 / 2, rng=4)
+    loose = game.converge(64, metric=metric, threshold=0.1, chunk_size=4096)
+    loose_samples = game.samples
+
+    assert loose_samples < 10 ** 9
+    assert loose.total == loose_samples
+    assert loose_samples % 4096 == 0
+
+    game.converge(64, metric=metric, threshold=0.02, chunk_size=4096)
+    assert game.samples > loose_samples
+
+    strict_samples = game.samples
+    game.converge(64, metric=metric, threshold=0.02, chunk_size=1024)
+    assert game.samples == strict_samples
+
+
+def test_no_repeat_rule():
+    """
+    Tests that a game with the no-repeat rule never picks the same corner
+    twice in a row, also across appended iterations and chunks, and has no
+    IFS to zoom with.
+    """
+    game = ChaosGame(4, 1 / 2, rng=0, rule=NO_REPEAT)
+    game.iterate(10000, discard=0, walkers=2)
+    game.iterate(100, append=True)
+
+    first = game.corner_list[:10000].reshape(2, -1)
+    appended = game.corner_list[10000:].reshape(2, -1)
+    walkers = np.concatenate([first, appended], axis=1).astype(int)
+    assert np.all(np.diff(walkers) != 0)
+
+    points = np.concatenate(
+        [points for points, _ in game.iter_chunks(1000, chunk_size=100)]
+    )
+    targets = (points[1:] - 0.5 * points[:-1]) / 0.5
+    corners = np.argmin(
+        np.linalg.norm(targets[:, None] - game.corners, axis=-1), axis=1
+    )
+    assert np.all(np.diff(corners) != 0)
+
+    with pytest.raises(ValueError):
+        game.zoom((0.1, 0.2, 0.1, 0.2), 1000)
+
+
 if __name__ == '__main__':
     pytest.main()
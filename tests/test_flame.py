@@ -0,0 +1,65 @@
+from fern import AffineTransform
+from flame import Flame
+import numpy as np
+import pytest
+
+
+def sierpinski(blends):
+    """Returns a flame with the three maps of the Sierpinski triangle."""
+    functions = [
+        AffineTransform(0.5, 0, 0, 0.5, 0, 0),
+        AffineTransform(0.5, 0, 0, 0.5, 0.5, 0),
+        AffineTransform(0.5, 0, 0, 0.5, 0.25, 0.5),
+    ]
+    return Flame(functions, blends, colors=[0, 0.5, 1])
+
+
+def test_linear_flame_is_the_ifs_attractor():
+    """
+    Tests that a flame with only linear variations stays on the attractor of
+    its affine maps, with color indexes between 0 and 1.
+    """
+    flame = sierpinski([{"linear": 1}] * 3)
+    points, colors = next(flame.iter_chunks(5000, walkers=100))
+
+    assert points.shape == (5000, 2) and colors.shape == (5000,)
+    assert np.all((points >= 0) & (points <= 1))
+    assert np.all((colors >= 0) & (colors <= 1))
+
+
+def test_render_image():
+    """
+    Tests that a rendered flame has the requested resolution, and that its
+    densest pixel is fully opaque.
+    """
+    flame = sierpinski([{"linear": 1, "swirl": 1}, {"disc": 1}, {"handkerchief": 1}])
+    image = flame.render(20000, resolution=(40, 30), supersample=2, walkers=500)
+
+    assert image.shape == (30, 40, 4)
+    assert np.isclose(image[..., 3].max(), 1)
+    assert flame.histogram.counts.shape == (30, 40)
+
+    xmin, xmax, ymin, ymax = flame.histogram.extent
+    assert np.isclose((xmax - xmin) / 40, (ymax - ymin) / 30)
+    assert xmin <= -1 and xmax >= 1 and ymin <= -1 and ymax >= 1
+
+
+def test_render_uses_given_rng():
+    """
+    Tests that a generator passed to render is used instead of the flame's
+    own, so that two flames give the same image.
+    """
+    blends = [{"linear": 1, "swirl": 1}, {"disc": 1}, {"handkerchief": 1}]
+    first = sierpinski(blends).render(5000, resolution=16, walkers=100, rng=3)
+    second = sierpinski(blends).render(5000, resolution=16, walkers=100, rng=3)
+
+    assert np.array_equal(first, second)
+
+
+def test_one_blend_per_map():
+    """
+    Tests that an exception is raised if the number of blends does not match
+    the number of maps.
+    """
+    with pytest.raises(ValueError):
+        sierpinski([{"linear": 1}])
@@ -0,0 +1,124 @@
+from chaos_game import ChaosGame
+from fern import AffineTransform, Fern
+from ifs import IFS
+from raster import Histogram, fit_resolution
+import numpy as np
+import pytest
+
+
+def test_iterate_matches_affine_transforms():
+    """
+    Tests that the block-wise composition gives the same points as applying
+    the transformations one at a time.
+    """
+    fern = Fern()
+    points, indices = fern.ifs.iterate(5000, start=(0.3, 0.2))
+
+    point = np.array([0.3, 0.2])
+    for i, index in enumerate(indices):
+        point = fern.functions[index](*point)
+        assert np.allclose(points[i], point, rtol=0, atol=1e-10)
+
+
+def test_user_defined_transforms():
+    """
+    Tests that a user-defined set of transformations gives a Sierpinski
+    triangle inside the unit square.
+    """
+    functions = [
+        AffineTransform(0.5, 0, 0, 0.5, 0, 0),
+        AffineTransform(0.5, 0, 0, 0.5, 0.5, 0),
+        AffineTransform(0.5, 0, 0, 0.5, 0.25, 0.5),
+    ]
+    ifs = IFS(functions, [1, 1, 1])
+    points, indices = ifs.iterate(10000)
+
+    assert np.allclose(ifs.probabilities, 1 / 3)
+    assert set(np.unique(indices)) == {0, 1, 2}
+    assert np.all((points >= 0) & (points <= 1))
+
+
+def test_probabilities_must_match_functions():
+    """
+    Tests that an exception is raised if the number of probabilities does not
+    match the number of transformations.
+    """
+    with pytest.raises(ValueError):
+        IFS([AffineTransform(0.5, 0, 0, 0.5, 0, 0)], [0.5, 0.5])
+
+
+def test_fern_walkers():
+    """
+    Tests that an ensemble of walkers stays within the bounds of the fern.
+    """
+    fern = Fern()
+    fern.iterate(20000, walkers=50)
+
+    assert fern.points.shape == (20000, 2)
+    assert np.all(fern.points[:, 0] > -2.2) and np.all(fern.points[:, 0] < 2.7)
+    assert np.all(fern.points[:, 1] >= 0) and np.all(fern.points[:, 1] < 10)
+
+
+def test_fern_float32():
+    """
+    Tests that the fern can be stored as float32 with uint8 map indices.
+    """
+    fern = Fern(dtype=np.float32)
+    fern.iterate(1000)
+    _, indices = next(fern.iter_chunks(100))
+
+    assert fern.points.dtype == np.float32
+    assert indices.dtype == np.uint8
+
+
+def test_deterministic_applies_every_map():
+    """
+    Tests that every level applies every map to every point, and that the
+    colors follow the gradient of the maps applied.
+    """
+    ifs = Fern().ifs
+    start = np.array([[0.3, 0.4], [-1.0, 2.0]])
+    colors = np.array([0.0, 1.0, 5.0, 2.0])
+
+    points, values = ifs.deterministic(2, start=start, colors=colors)
+
+    expected, expected_values = [], []
+    for p in start:
+        for i, first in enumerate(ifs.coefficients):
+            for j, second in enumerate(ifs.coefficients):
+                q = first[:, :2] @ p + first[:, 2]
+                expected.append(second[:, :2] @ q + second[:, 2])
+                expected_values.append((colors[i] / 2 + colors[j]) / 2)
+
+    order = np.lexsort(points.T)
+    expected = np.array(expected)
+    assert len(points) == 2 * 4 ** 2
+    assert np.allclose(points[order], expected[np.lexsort(expected.T)])
+    assert np.allclose(
+        values[order], np.array(expected_values)[np.lexsort(expected.T)]
+    )
+
+
+def test_deterministic_grid_bounds_points():
+    """
+    Tests that deduplicating on a grid keeps at most one point per pixel,
+    while the full point set grows by n at every level.
+    """
+    game = ChaosGame(3, 1 / 2)
+    game.iterate(100)
+    game.iterate_deterministic(5)
+    assert len(game.points) == 3 ** 6
+    with pytest.raises(ValueError, match="no previous iteration"):
+        game.iterate(100, append=True)
+
+    game.iterate_deterministic(25, resolution=64)
+    histogram = Histogram(game.extent, fit_resolution(game.extent, 64))
+    histogram.add(game.points)
+
+    assert histogram.total == len(game.points)
+    assert histogram.counts.max() == 1
+    assert len(game.points) > 1000
+
+    fern = Fern()
+    fern.iterate_deterministic(20, resolution=100)
+    assert len(fern.points) <= 100 * fit_resolution(Fern.extent, 100)[1]
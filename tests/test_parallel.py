@@ -0,0 +1,31 @@
+from chaos_game import ChaosGame
+from fern import Fern
+from functools import partial
+from parallel import render
+import numpy as np
+
+
+def test_same_seed_gives_same_histogram():
+    """
+    Tests that a parallel render is reproducible for a given seed and number
+    of workers, and that all points are binned.
+    """
+    factory = partial(ChaosGame, 3, 1 / 2)
+
+    first = render(factory, 20000, resolution=64, seed=7, workers=2)
+    second = render(factory, 20000, resolution=64, seed=7, workers=2)
+    other = render(factory, 20000, resolution=64, seed=8, workers=2)
+
+    assert first.total == 20000
+    assert np.array_equal(first.counts, second.counts)
+    assert np.array_equal(first.sums, second.sums)
+    assert not np.array_equal(first.counts, other.counts)
+
+
+def test_fern_workers():
+    """
+    Tests that the fern can be rendered by several workers.
+    """
+    histogram = render(Fern, 10000, resolution=32, seed=1, workers=3)
+
+    assert histogram.counts.sum() > 9900
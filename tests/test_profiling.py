@@ -0,0 +1,73 @@
+from chaos_game import ChaosGame
+from fern import Fern
+from profiling import Collector, stage
+from variations import Variations
+
+
+def test_collector_records_stages():
+    """
+    Tests that the stages of an iteration and a variation are recorded with
+    their points, and that the callback gets every record.
+    """
+    seen = []
+    game = ChaosGame(4, 1 / 3, rng=0)
+
+    with Collector(callback=seen.append) as collector:
+        game.iterate(1000)
+        Variations(game.points[:, 0], game.points[:, 1])([1, 1], ["swirl", "disc"])
+
+    stages = [record["stage"] for record in collector.records]
+    assert stages == [
+        "ChaosGame.iterate",
+        "ChaosGame.color",
+        "Variations.swirl",
+        "Variations.disc",
+        "Variations.blend",
+    ]
+    assert seen == collector.records
+    assert collector.records[0]["points"] == 1000
+    assert all(record["seconds"] >= 0 for record in collector.records)
+
+    summary = collector.summary()
+    assert summary["ChaosGame.color"] == {
+        "calls": 1,
+        "seconds": collector.records[1]["seconds"],
+        "points": 995,
+        "bytes": 0,
+        "points_per_sec": summary["ChaosGame.color"]["points_per_sec"],
+    }
+
+
+def test_memory_and_progress():
+    """
+    Tests that the memory of a stage includes the memory of its inner stages,
+    and that long iterations report their progress up to the total.
+    """
+    reports = []
+    fern = Fern(rng=0)
+
+    collector = Collector(
+        memory=True, progress=lambda *args: reports.append(args), interval=0
+    )
+    with collector, stage("outer", 0):
+        fern.iterate(20000)
+
+    inner, outer = collector.records
+    assert inner["stage"] == "Fern.iterate"
+    assert inner["bytes"] >= 20000 * 2 * 8
+    assert outer["bytes"] >= inner["bytes"]
+    assert reports[-1] == ("Fern.iterate", 19999, 19999)
+
+
+def test_disabled_records_nothing():
+    """
+    Tests that nothing is recorded outside a collector.
+    """
+    collector = Collector()
+    ChaosGame(3, 1 / 2).iterate(100)
+
+    with collector:
+        pass
+
+    assert collector.records == []
+    assert stage("anything", 10).__enter__() is None
@@ -0,0 +1,155 @@
+from raster import Histogram
+import numpy as np
+import os
+import pytest
+import subprocess
+import sys
+
+
+def test_add_in_blocks_matches_histogram2d():
+    """
+    Tests that adding points block by block gives the same counts as
+    binning all of them at once.
+    """
+    points = np.random.random(size=(10000, 2)) * 2 - 1
+    histogram = Histogram((-1, 1, -1, 1), resolution=(40, 30))
+
+    for block in np.array_split(points, 7):
+        histogram.add(block)
+
+    expected, _, _ = np.histogram2d(
+        points[:, 1], points[:, 0], bins=(30, 40), range=((-1, 1), (-1, 1))
+    )
+
+    assert histogram.total == 10000
+    assert np.array_equal(histogram.counts, expected)
+
+
+def test_color_sums_and_image():
+    """
+    Tests that the color values are summed per pixel, and that the image is
+    fully opaque where the density is highest.
+    """
+    histogram = Histogram((0, 2, 0, 1), resolution=(2, 1))
+    histogram.add(np.array([[0.5, 0.5], [0.5, 0.5], [1.5, 0.5]]), [1, 3, 5])
+
+    assert np.array_equal(histogram.counts, [[2, 1]])
+    assert np.array_equal(histogram.sums, [[4, 5]])
+
+    image = histogram.image()
+    assert image.shape == (1, 2, 4)
+    assert image[0, 0, 3] == 1
+
+
+def test_extent_must_be_ordered():
+    """
+    Tests that an exception is raised if the extent is empty.
+    """
+    with pytest.raises(ValueError):
+        Histogram((1, -1, 0, 1))
+
+
+def test_write_png_reads_back(tmp_path):
+    """
+    Tests that a png written without matplotlib reads back as the same image,
+    with and without transparency.
+    """
+    import matplotlib.image
+    from raster import write_png
+
+    image = np.random.random(size=(13, 21, 4))
+    expected = np.round(image * 255).astype(np.uint8)
+
+    write_png(tmp_path / "rgba.png", image, background=None)
+    read = matplotlib.image.imread(tmp_path / "rgba.png")
+    assert np.array_equal(np.round(read * 255), expected)
+
+    write_png(tmp_path / "rgb.png", expected[..., :3])
+    assert matplotlib.image.imread(tmp_path / "rgb.png").shape == (13, 21, 3)
+
+
+def test_png_writer_keeps_exception(tmp_path):
+    """
+    Tests that an exception raised while writing rows is passed on instead
+    of the missing rows error, and that the unfinished file is removed.
+    """
+    from raster import PNGWriter
+
+    with pytest.raises(KeyError):
+        with PNGWriter(tmp_path / "broken.png", 3, 4) as png:
+            png.write_rows(np.zeros(shape=(2, 3, 3)))
+            raise KeyError("body")
+
+    assert not (tmp_path / "broken.png").exists()
+
+    with pytest.raises(ValueError, match="wrote 2 of 4 rows"):
+        with PNGWriter(tmp_path / "short.png", 3, 4) as png:
+            png.write_rows(np.zeros(shape=(2, 3, 3)))
+
+
+def test_chaos_game_write_png(tmp_path):
+    """
+    Tests that a chaos game can be written to any path at a given width.
+    """
+    import matplotlib.image
+    from chaos_game import ChaosGame
+
+    game = ChaosGame(3, 1 / 2)
+    game.iterate(5000)
+    game.write_png(tmp_path / "triangle.png", resolution=64, color=True)
+
+    assert matplotlib.image.imread(tmp_path / "triangle.png").shape[1:] == (64, 3)
+
+
+def test_zoom_write_png_covers_viewport(tmp_path):
+    """
+    Tests that a zoomed game is drawn over its viewport, and that the next
+    iteration draws the whole figure again.
+    """
+    import matplotlib.image
+    from chaos_game import ChaosGame
+
+    viewport = (0.1, 0.1002, -0.4, -0.3998)
+    game = ChaosGame(3, 1 / 2, rng=0)
+    game.zoom(viewport, 100000)
+    game.write_png(tmp_path / "zoom.png", resolution=64)
+
+    assert game.viewport == viewport
+    image = matplotlib.image.imread(tmp_path / "zoom.png")
+    assert np.mean(image.min(axis=-1) < 1) > 0.1
+
+    game.iterate(1000)
+    assert game.viewport is None
+
+
+def test_matplotlib_is_imported_lazily(tmp_path):
+    """
+    Tests that generating points and writing a PNG file with plain colors
+    does not import matplotlib, and that plotting without a display uses Agg.
+    """
+    script = (
+        "import sys\n"
+        "from chaos_game import ChaosGame\n"
+        "from fern import Fern\n"
+        "import variations, triangle, flame, parallel, tiled\n"
+        "game = ChaosGame(3, 1 / 2)\n"
+        "game.iterate(1000)\n"
+        f"game.write_png({str(tmp_path / 'game.png')!r}, resolution=32)\n"
+        "fern = Fern()\n"
+        "fern.iterate(1000)\n"
+        f"fern.write_png({str(tmp_path / 'fern.png')!r}, resolution=32)\n"
+        "assert 'matplotlib' not in sys.modules\n"
+        "game.plot()\n"
+        "import matplotlib\n"
+        "print(matplotlib.get_backend())\n"
+    )
+    env = {k: v for k, v in os.environ.items() if k not in ("DISPLAY", "MPLBACKEND")}
+    env.pop("WAYLAND_DISPLAY", None)
+    env["PYTHONPATH"] = os.getcwd()
+
+    result = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().lower() == "agg"
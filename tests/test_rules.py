@@ -0,0 +1,74 @@
+from rules import NO_REPEAT, NOT_NEIGHBOUR, Exclude, markov_chain, transition_matrix
+import numpy as np
+import pytest
+
+
+def test_exclude_matrix():
+    """
+    Tests that an excluded corner is never picked and the others are equally
+    likely.
+    """
+    matrix = NOT_NEIGHBOUR.matrix(5)
+
+    assert np.allclose(matrix.sum(axis=1), 1)
+    for i in range(5):
+        assert matrix[i, (i - 1) % 5] == matrix[i, (i + 1) % 5] == 0
+        assert np.allclose(matrix[i, [i, (i + 2) % 5, (i + 3) % 5]], 1 / 3)
+
+    with pytest.raises(ValueError):
+        Exclude(0, 1, 2).matrix(3)
+
+
+def test_transition_matrix_is_checked():
+    """
+    Tests that transition_matrix normalizes the rows and rejects matrices of
+    the wrong shape, with negative weights or with an empty row.
+    """
+    assert np.allclose(transition_matrix([[1, 3], [2, 2]], 2), [[0.25, 0.75], [0.5, 0.5]])
+
+    for matrix in [np.ones((3, 3)), [[1, -1], [1, 1]], [[0, 0], [1, 1]]]:
+        with pytest.raises(ValueError):
+            transition_matrix(matrix, 2)
+
+
+@pytest.mark.parametrize(
+    "rule", [[[0, 1, 1], [2, 0, 1], [1, 1, 1]], [[1, 1, 0], [0, 1, 1], [1, 0, 0]]]
+)
+def test_markov_chain_matches_loop(rule):
+    """
+    Tests that markov_chain picks the same corners as a loop over the steps
+    using the same random numbers, in several blocks and for several walkers.
+    """
+    matrix = transition_matrix(rule, 3)
+    previous = np.array([0, 2])
+    corners = markov_chain(
+        matrix, previous, 1000, np.random.default_rng(3), block=3 * 2 * 256
+    )
+
+    u = np.random.default_rng(3).random((2, 1000))
+    cumulative = np.cumsum(matrix, axis=1)
+    for walker in range(2):
+        corner = previous[walker]
+        for step in range(1000):
+            row = cumulative[corner]
+            corner = np.searchsorted(row, u[walker, step] * row[-1], side="right")
+            assert corners[walker, step] == corner
+
+
+@pytest.mark.parametrize("rule", [NO_REPEAT, [[0, 1, 1], [2, 0, 1], [1, 1, 1]]])
+def test_markov_chain_frequencies(rule):
+    """
+    Tests that the frequencies of the transitions of a long chain match the
+    transition matrix.
+    """
+    matrix = transition_matrix(rule, 3)
+    corners = markov_chain(matrix, 0, 10 ** 6, np.random.default_rng(0))
+
+    counts = np.zeros(shape=(3, 3))
+    np.add.at(counts, (corners[:-1], corners[1:]), 1)
+
+    assert np.allclose(counts / counts.sum(axis=1, keepdims=True), matrix, atol=0.01)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,56 @@
+from chaos_game import ChaosGame
+from raster import Histogram
+from tiled import TILE_PIXELS, TiledHistogram, render_tiled
+import matplotlib.image
+import numpy as np
+
+
+def test_tiled_png_matches_in_memory_png(tmp_path):
+    """
+    Tests that a disk-backed histogram written tile by tile gives the same
+    image as an in-memory histogram of the same points.
+    """
+    points = np.random.normal(scale=0.4, size=(20000, 2))
+    values = np.random.random(20000)
+    extent, resolution = (-1, 1, -1, 1), (50, 37)
+
+    tiled = TiledHistogram(extent, resolution, str(tmp_path), tile=8)
+    for block in range(0, 20000, 3000):
+        tiled.add(points[block : block + 3000], values[block : block + 3000])
+    tiled.save_png(tmp_path / "tiled.png")
+
+    histogram = Histogram(extent, resolution)
+    histogram.add(points, values)
+    histogram.save_png(tmp_path / "memory.png")
+
+    assert np.array_equal(tiled.counts, histogram.counts)
+    tiled_image = matplotlib.image.imread(tmp_path / "tiled.png")
+    memory_image = matplotlib.image.imread(tmp_path / "memory.png")
+    assert np.abs(tiled_image - memory_image).max() <= 1 / 255 + 1e-6
+
+
+def test_render_tiled_chaos_game(tmp_path):
+    """
+    Tests that a chaos game can be rendered in tiles at a given width, and
+    that the temporary files are removed.
+    """
+    game = ChaosGame(5, 1 / 3)
+    render_tiled(game, 50000, tmp_path / "pentagon.png", 120, tile=16, color=True)
+
+    image = matplotlib.image.imread(tmp_path / "pentagon.png")
+    assert image.shape[1:] == (120, 3)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["pentagon.png"]
+
+
+def test_default_tile_follows_width(tmp_path):
+    """
+    Tests that the default number of rows in a tile shrinks with the width,
+    so that a tile holds about TILE_PIXELS pixels at any width.
+    """
+    (tmp_path / "narrow").mkdir()
+    (tmp_path / "wide").mkdir()
+    narrow = TiledHistogram((0, 1, 0, 1), (1000, 2), str(tmp_path / "narrow"))
+    wide = TiledHistogram((0, 1, 0, 1), (40000, 2), str(tmp_path / "wide"))
+
+    assert narrow.tile * 1000 <= TILE_PIXELS < (narrow.tile + 1) * 1000
+    assert wide.tile * 40000 <= TILE_PIXELS
@@ -0,0 +1,72 @@
+from triangle import Triangle
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+
+def test_one_pass_gives_all_outputs():
+    """
+    Tests that a single iteration gives points, corners and a gradient that
+    all come from the same picked corners.
+    """
+    figure = Triangle()
+    figure.iterate(1000, corners=True, gradient=True)
+
+    corners = np.array(figure.corners, dtype=float)
+    halfway = (figure.points[:-1] + corners[figure.corner_list[1:]]) / 2
+    assert np.allclose(figure.points[1:], halfway)
+
+    rgb = np.eye(3)[figure.corner_list[1:]]
+    assert np.allclose(figure.gradient[1:], (figure.gradient[:-1] + rgb) / 2)
+    assert figure.iteration == "gradient"
+
+
+def test_iter_chunks_discard():
+    """
+    Tests that iter_chunks yields the first point, with the color of its own
+    corner, when nothing is discarded, and skips exactly it when one point is
+    discarded.
+    """
+    chunks = Triangle(rng=3).iter_chunks(10, chunk_size=4, discard=0)
+    points, colors = (np.concatenate(arrays) for arrays in zip(*chunks))
+    skipped, _ = next(Triangle(rng=3).iter_chunks(10, discard=1))
+
+    assert len(points) == len(colors) == 10
+    assert np.allclose(np.sort(colors[0]), [0, 0, 1])
+
+    corners = np.array(Triangle().corners, dtype=float)
+    corner = 2 * skipped[0] - points[0]
+    assert np.isclose(np.linalg.norm(corners - corner, axis=1), 0).any()
+
+
+def test_plot_needs_computed_coloring(monkeypatch):
+    """
+    Tests that an exception is raised when plotting a coloring that the last
+    iteration did not compute.
+    """
+    monkeypatch.setattr(plt, "show", lambda: None)
+    figure = Triangle()
+    figure.iterate_color(100)
+    figure.plot("color")
+    colors = plt.gca().collections[0].get_facecolors()[:, :3]
+    plt.close()
+
+    # The corners keep the named colors red, green and blue
+    named = np.array([[1, 0, 0], [0, 128 / 255, 0], [0, 0, 1]])
+    assert np.allclose(colors, named[figure.corner_list[5:]])
+
+    with pytest.raises(ValueError):
+        figure.plot("gradient")
+
+
+def test_compact_dtypes():
+    """
+    Tests that the corner indexes are uint8, and that the points and gradient
+    can be stored as float32.
+    """
+    figure = Triangle(dtype=np.float32)
+    figure.iterate(1000, corners=True, gradient=True)
+
+    assert figure.corner_list.dtype == np.uint8
+    assert figure.points.dtype == figure.gradient.dtype == np.float32
+    assert np.all((figure.gradient >= 0) & (figure.gradient <= 1))
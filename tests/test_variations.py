@@ -0,0 +1,82 @@
+from variations import Variations
+import numpy as np
+import pytest
+
+
+def reference(x, y):
+    """Returns each variation computed directly from its formula."""
+    r = np.sqrt(x ** 2 + y ** 2)
+    theta = np.arctan2(x, y)
+
+    return {
+        "linear": (x, y),
+        "handkerchief": (r * np.sin(theta + r), r * np.cos(theta - r)),
+        "swirl": (
+            x * np.sin(r ** 2) - y * np.cos(r ** 2),
+            x * np.cos(r ** 2) + y * np.sin(r ** 2),
+        ),
+        "disc": (theta / np.pi * np.sin(np.pi * r), theta / np.pi * np.cos(np.pi * r)),
+    }
+
+
+def test_variations_match_formulas():
+    """
+    Tests that every variation gives the coordinates of its formula.
+    """
+    x, y = np.random.normal(size=(2, 1000))
+    coords = Variations(x, y)
+
+    for name, (u, v) in reference(x, y).items():
+        coords.collection[name]()
+        assert np.allclose(coords.u, u) and np.allclose(coords.v, v)
+
+
+def test_repeated_calls_reuse_cached_variations():
+    """
+    Tests that a linear combination is computed correctly, and that calling
+    it again reuses the cached variations instead of recomputing them.
+    """
+    x, y = np.random.normal(size=(2, 1000))
+    coords = Variations(x, y)
+    expected = reference(x, y)
+
+    u, v = coords([1, 3], ["swirl", "disc"])
+    cached = coords._cache["swirl"]
+    u_again, _ = coords([1, 3], ["swirl", "disc"])
+
+    assert np.allclose(u, 0.25 * expected["swirl"][0] + 0.75 * expected["disc"][0])
+    assert np.array_equal(u, u_again)
+    assert coords._cache["swirl"] is cached
+    assert not cached[0].flags.writeable
+
+    coords.linear()
+    assert not coords.u.flags.writeable
+    assert x.flags.writeable and y.flags.writeable
+
+
+def test_unknown_variation():
+    """
+    Tests that an exception is raised for a variation that does not exist.
+    """
+    with pytest.raises(ValueError):
+        Variations(np.zeros(3), np.zeros(3))([1], ["spherical"])
+
+
+def test_sweep_matches_single_combinations():
+    """
+    Tests that a sweep over many sets of weights gives the same coordinates
+    as calling each linear combination on its own.
+    """
+    x, y = np.random.normal(size=(2, 500))
+    coords = Variations(x, y)
+    names = ["linear", "swirl", "disc"]
+    coefficients = np.random.random(size=(6, 3))
+
+    u, v = coords.sweep(coefficients, names)
+    streamed = list(coords.iter_sweep(coefficients, names))
+
+    assert u.shape == v.shape == (6, 500)
+    for i, row in enumerate(coefficients):
+        expected_u, expected_v = Variations(x, y)(row, names)
+        assert np.allclose(u[i], expected_u) and np.allclose(v[i], expected_v)
+        assert np.allclose(streamed[i][0], expected_u)
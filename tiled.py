@@ -0,0 +1,214 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from raster import Histogram, PNGWriter, _accumulate, fit_resolution, to_bytes
+
+# Pixels in a tile by default, which bounds the memory of one tile of the image
+TILE_PIXELS = 2 ** 20
+
+
+class TiledHistogram(Histogram):
+    """A density image stored on disk and handled one tile of rows at a time.
+
+    The counts and color sums are memory mapped files, so the image can be
+    much larger than the memory. Points are routed to the tile of rows they
+    fall in, and the image is written to a PNG file one tile at a time.
+
+    Attributes
+    ----------
+    tile : int
+        Number of rows in each tile
+    directory : str
+        Directory of the memory mapped files
+    ----------
+    extent : tuple of float
+        The area covered, as (xmin, xmax, ymin, ymax)
+    resolution : int or tuple of int
+        Number of pixels as width or (width, height)
+    directory : str
+        Directory to store the counts and color sums in
+    tile : int, optional
+        Number of rows in each tile, by default as many as fit in TILE_PIXELS
+    dtype : dtype, optional
+        Type of the counts, by default uint32
+    """
+
+    def __init__(self, extent, resolution, directory, tile=None, dtype=np.uint32):
+        if np.ndim(resolution) == 0:
+            resolution = (resolution, resolution)
+
+        # Only sets up the extent; the counts are replaced by a file below
+        super().__init__(extent, (1, 1))
+
+        self.width, self.height = int(resolution[0]), int(resolution[1])
+        self.tile = max(1, TILE_PIXELS // self.width) if tile is None else tile
+        self.directory = directory
+
+        self.counts = np.lib.format.open_memmap(
+            os.path.join(directory, "counts.npy"),
+            mode="w+",
+            dtype=dtype,
+            shape=(self.height, self.width),
+        )
+        self.sums = None
+
+    def _tiles(self):
+        """Yields the first and last row of every tile, from the top."""
+        for hi in range(self.height, 0, -self.tile):
+            yield max(0, hi - self.tile), hi
+
+    def add(self, points, values=None):
+        """Adds a block of points to the image.
+
+        Parameters
+        ----------
+        points : ndarray (m, 2)
+            Coordinates of the points
+        values : ndarray (m, ), optional
+            Color value of each point, by default no color values
+        """
+        index, inside = self._pixels(np.asarray(points))
+
+        if values is not None:
+            values = np.asarray(values, dtype=np.float32)[inside]
+            if self.sums is None:
+                self.sums = np.lib.format.open_memmap(
+                    os.path.join(self.directory, "sums.npy"),
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=(self.height, self.width),
+                )
+
+        # Sort the points by tile, and add each tile's points to its rows only
+        pixels = self.tile * self.width
+        tiles = index // pixels
+        order = np.argsort(tiles, kind="stable")
+        index, tiles = index[order], tiles[order]
+        bounds = np.searchsorted(tiles, np.arange(tiles[-1] + 2)) if tiles.size else []
+
+        for t, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if lo == hi:
+                continue
+
+            rows = slice(t * self.tile, (t + 1) * self.tile)
+            local = index[lo:hi] - t * pixels
+
+            _accumulate(self.counts[rows], local)
+            if values is not None:
+                _accumulate(self.sums[rows], local, values[order[lo:hi]])
+
+    def save_png(self, path, background="white", **kwargs):
+        """Writes the image to a PNG file, one tile of rows at a time.
+
+        Takes the same keyword arguments as Histogram.image. The density and
+        colors are scaled by the whole image, not by each tile.
+
+        Parameters
+        ----------
+        path : str
+            Path of the output file
+        background : color or None, optional
+            Color the image is drawn on top of. If None the transparency is
+            kept. By default "white".
+        """
+        peak = max(int(self.counts[lo:hi].max()) for lo, hi in self._tiles())
+        kwargs.setdefault("peak", peak)
+
+        if self.sums is not None and "vmin" not in kwargs:
+            kwargs["vmin"], kwargs["vmax"] = self._value_range()
+
+        channels = 3 if background is not None else 4
+        with PNGWriter(path, self.width, self.height, channels) as png:
+            for lo, hi in self._tiles():
+                strip = Histogram(self.extent, (self.width, hi - lo))
+                strip.counts = np.asarray(self.counts[lo:hi])
+                if self.sums is not None:
+                    strip.sums = np.asarray(self.sums[lo:hi], dtype=float)
+
+                png.write_rows(to_bytes(strip.image(**kwargs), background))
+
+    def _value_range(self):
+        """Returns the smallest and largest mean color value of the pixels."""
+        vmin, vmax = np.inf, -np.inf
+
+        for lo, hi in self._tiles():
+            counts = np.asarray(self.counts[lo:hi])
+            filled = counts > 0
+            if filled.any():
+                mean = self.sums[lo:hi][filled] / counts[filled]
+                vmin, vmax = min(vmin, mean.min()), max(vmax, mean.max())
+
+        return (0.0, 1.0) if vmin > vmax else (vmin, vmax)
+
+
+def render_tiled(
+    figure,
+    steps,
+    path,
+    resolution,
+    extent=None,
+    color=False,
+    directory=None,
+    tile=None,
+    chunk_size=2 ** 20,
+    **kwargs
+):
+    """Renders a figure to a PNG file of any size in bounded memory.
+
+    The points are generated in blocks with iter_chunks and binned into a
+    disk-backed TiledHistogram, which is then written one tile at a time.
+
+    Parameters
+    ----------
+    figure : ChaosGame, Fern or any object with iter_chunks
+        The figure to render
+    steps : int
+        Number of points to be generated
+    path : str
+        Path of the output file
+    resolution : int
+        Width of the image in pixels; the height follows from the extent
+    extent : tuple of float, optional
+        The area covered, as (xmin, xmax, ymin, ymax), by default the extent
+        of the figure
+    color : bool, optional
+        Colors the points by the color values of iter_chunks if True, and uses
+        a single color if False, by default False
+    directory : str, optional
+        Directory for the memory mapped files, by default a temporary
+        directory that is removed afterwards
+    tile : int, optional
+        Number of rows in each tile, by default as many as fit in TILE_PIXELS
+    chunk_size : int, optional
+        Number of points generated at a time, by default 2**20
+    **kwargs
+        Passed on to Histogram.image, such as cmap or color
+
+    Returns
+    -------
+    TiledHistogram
+        The histogram, which is only usable if directory was given
+    """
+    if extent is None:
+        extent = figure.extent
+
+    temporary = directory is None
+    if temporary:
+        directory = tempfile.mkdtemp(prefix="chaos-tiles-")
+
+    try:
+        histogram = TiledHistogram(
+            extent, fit_resolution(extent, resolution), directory, tile=tile
+        )
+        for points, values in figure.iter_chunks(steps, chunk_size):
+            histogram.add(points, values if color else None)
+
+        histogram.save_png(path, **kwargs)
+        histogram.counts.flush()
+    finally:
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    return histogram
@@ -1,9 +1,14 @@
 import numpy as np
-import matplotlib.pyplot as plt
+from chaos_game import color_gradient, fill_recurrence, linear_recurrence
+from profiling import stage
+from raster import _to_rgb, plot_points, pyplot
+
+# Colors of the points of each corner in the "color" plot
+CORNER_COLORS = np.array([_to_rgb(c) for c in ("red", "green", "blue")])
 
 
 class Triangle:
-    def __init__(self):
+    def __init__(self, dtype=np.float64, rng=None):
         """Triangle object.
 
         Attributes
@@ -16,8 +21,20 @@ class Triangle:
             Description of which iteration method was used.
         color : ndarray
             Color values for each point to be used in the plotting method.
+        corner_list : ndarray of int, or None
+            Index of the randomly picked corner of each point.
+        gradient : ndarray (n, 3), or None
+            RGB color gradient value of each point.
+        dtype : dtype
+            Type of the points and gradient, for example float32 to halve
+            their memory. Corner indexes are always uint8.
+        rng : Generator
+            Random number generator, made from the rng argument, which may
+            also be a seed.
         """
         self.corners = self.create_triangle()
+        self.dtype = np.dtype(dtype)
+        self.rng = np.random.default_rng(rng)
 
     def create_triangle(self):
         """Returns coordinates for the three corners of the triangle.
@@ -42,60 +59,86 @@ class Triangle:
 
         return [c0, c1, c2]
 
-    def random_starting_point(self):
+    def random_starting_point(self, rng=None):
         """Returns a random point inside the triangle
 
         finds a random point inside the triangle by taking the coordinates 
         of the three corners and giving multiplying them with random weights.
 
+        Parameters
+        ----------
+        rng : Generator, optional
+            Random number generator, by default the one of the triangle
+
         Returns
         -------
         point: ndarray of floats
             Coordinates of random point inside the triangle
         """
-        c0, c1, c2 = self.corners[0], self.corners[1], self.corners[2]
-
-        w = np.zeros(3)  # Array to store weights
-
-        for i in range(w.size):
-            w[i] = np.random.random()
+        w = (self.rng if rng is None else rng).random(3)
 
         # Divide all weights by the sum of the weights so that they sum to one
         w = w / np.sum(w)
 
-        point = np.array(
-            [
-                c0[0] * w[0] + c1[0] * w[1] + c2[0] * w[2],
-                c0[1] * w[0] + c1[1] * w[1] + c2[1] * w[2],
-            ]
-        )
-
-        return point
+        return w @ np.array(self.corners, dtype=float)
 
-    def iterate(self, n):
+    def iterate(self, n, corners=False, gradient=False, rng=None):
         """Generates points withing the triangle iteratively.
 
         Starts at a random point within the triangle and finds the point
         that is halfway between the current point and a randomly picked corner.
-        Also sets the iteration parameter to be "black".
+        All the corners are picked at once, and the points are computed with
+        array operations.
+
+        The same picked corners can also give the corner index of each point,
+        and an RGB color gradient where each corner coresponds to an RGB value
+        and each point gets
+        (previous points RGB value + current corners RGB value) / 2.
+        Sets the iteration parameter to the richest coloring computed:
+        "gradient", "color" or "black".
 
         Parameters
         ----------
         n : int
             Number of iterations
+        corners : bool, optional
+            Stores the picked corner indexes in corner_list, by default False
+        gradient : bool, optional
+            Stores the RGB color gradient in gradient, by default False
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the triangle
         """
-        random_corner = np.random.randint(3)
-        points = np.zeros(shape=(n, 2))
-        points[0] = (self.random_starting_point() + self.corners[random_corner]) / 2
+        rng = self.rng if rng is None else np.random.default_rng(rng)
 
-        for i in range(1, n):
-            random_corner = np.random.randint(3)
-            points[i] = (points[i - 1] + self.corners[random_corner]) / 2
+        with stage("Triangle.iterate", n):
+            corner_list = rng.integers(3, size=n, dtype=np.uint8)
 
-        self.points = points
-        self.iteration = "black"
+            start = self.random_starting_point(rng)
+            corners_xy = np.array(self.corners, dtype=float)
+            points = np.empty(shape=(n, 2), dtype=self.dtype)
+            fill_recurrence(points, start, corner_list, corners_xy, 1 / 2)
 
-    def iterate_color(self, n):
+        self.points = points
+        self.corner_list = corner_list if corners else None
+        self.gradient = None
+
+        if gradient:
+            # RGB values coresponding to each corner index, starting with the
+            # color of the first corner
+            rgb = np.eye(3)
+            with stage("Triangle.gradient", n):
+                self.gradient = np.empty(shape=(n, 3), dtype=self.dtype)
+                fill_recurrence(
+                    self.gradient, rgb[corner_list[0]], corner_list, rgb, 1 / 2
+                )
+            self.iteration, self.color = "gradient", self.gradient
+        elif corners:
+            self.iteration, self.color = "color", self.corner_list
+        else:
+            self.iteration, self.color = "black", None
+
+    def iterate_color(self, n, rng=None):
         """Generates points and saves the randomly picked corners in an array.
 
         Does the same thing as iterate(), but also stores the randomly picked
@@ -106,25 +149,13 @@ class Triangle:
         ----------
         n : int
             Number of iterations
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the triangle
         """
+        self.iterate(n, corners=True, rng=rng)
 
-        color = np.zeros(shape=(n,))  # Array to store randomly picked corners
-        random_corner = np.random.randint(3)
-        color[0] = random_corner
-
-        points = np.zeros(shape=(n, 2))
-        points[0] = (self.random_starting_point() + self.corners[random_corner]) / 2
-
-        for i in range(1, n):
-            random_corner = np.random.randint(3)
-            color[i] = random_corner
-            points[i] = (points[i - 1] + self.corners[random_corner]) / 2
-
-        self.points = points
-        self.color = color
-        self.iteration = "color"
-
-    def iterate_gradient(self, n):
+    def iterate_gradient(self, n, rng=None):
         """Generates points and assigns them a RGB color value
 
         Does the same thing as iterate(), but also assigns a RGB color value
@@ -137,65 +168,116 @@ class Triangle:
         ----------
         n : int
             Number of iterations
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the triangle
         """
-        color = np.zeros(shape=(n, 3))
-
-        random_corner = np.random.randint(3)
-
-        # RGB values coresponding to each corner index
-        if random_corner == 0:
-            color[0] = [1, 0, 0]
-
-        if random_corner == 1:
-            color[0] = [0, 1, 0]
+        self.iterate(n, gradient=True, rng=rng)
 
-        if random_corner == 2:
-            color[0] = [0, 0, 1]
+    def iter_chunks(self, total, chunk_size=2 ** 20, discard=5, rng=None):
+        """Generates points and RGB color values in blocks of fixed size.
 
-        points = np.zeros(shape=(n, 2))
-        points[0] = (self.random_starting_point() + self.corners[random_corner]) / 2
+        Works like iterate_gradient, but yields the points and colors one
+        block at a time, carrying the current point and color over to the
+        next block, so that arbitrarily long runs only need memory for one
+        block.
 
-        for i in range(1, n):
-            random_corner = np.random.randint(3)
-
-            if random_corner == 0:
-                r = [1, 0, 0]
-
-            if random_corner == 1:
-                r = [0, 1, 0]
-
-            if random_corner == 2:
-                r = [0, 0, 1]
-
-            color[i] = (color[i - 1] + r) / 2
-
-            points[i] = (points[i - 1] + self.corners[random_corner]) / 2
-
-        self.points = points
-        self.color = color
-        self.iteration = "gradient"
-
-    def plot(self):
-        """Plots the triangle.
-
-        Checks which iteration function was last called on, and plots the
-        coresponding colors accordingly.
+        Parameters
+        ----------
+        total : int
+            Number of points to be generated, after discarding
+        chunk_size : int, optional
+            Number of points in each block, by default 2**20
+        discard : int, optional
+            Number of first points to be discarded, by default 5
+        rng : Generator or int, optional
+            Random number generator, or a seed for one, by default the one
+            of the triangle
+
+        Yields
+        ------
+        points : ndarray (chunk_size, 2)
+            Coordinates of the generated points
+        color : ndarray (chunk_size, 3)
+            RGB color values of the points
         """
-        if self.iteration == "color":
-            red = self.points[self.color == 0]
-            green = self.points[self.color == 1]
-            blue = self.points[self.color == 2]
-
-            plt.scatter(*zip(*red[5:]), s=0.1, color="red")
-            plt.scatter(*zip(*green[5:]), s=0.1, color="green")
-            plt.scatter(*zip(*blue[5:]), s=0.1, color="blue")
-
-        if self.iteration == "gradient":
-            plt.scatter(*zip(*self.points[5:]), s=0.1, color=self.color[5:])
+        corners = np.array(self.corners, dtype=float)
+        rgb = np.eye(3)
+        rng = self.rng if rng is None else np.random.default_rng(rng)
+
+        random_corner = rng.integers(3)
+        start = self.random_starting_point(rng)
+        # The first point has the color of its own corner
+        color = rgb[random_corner]
+
+        if discard == 0:
+            # The first block starts from the starting point with this corner
+            point, first = start, np.array([random_corner], dtype=np.uint8)
+        else:
+            point = (start + corners[random_corner]) / 2
+            first = np.empty(0, dtype=np.uint8)
+
+        if discard > 1:
+            random_corners = rng.integers(3, size=discard - 1, dtype=np.uint8)
+            point = linear_recurrence(point, corners[random_corners], 1 / 2)[-1]
+            color = color_gradient(random_corners, rgb, start=color)[-1]
+
+        for lo in range(0, total, chunk_size):
+            size = min(chunk_size, total - lo)
+            with stage("Triangle.iter_chunks", size):
+                random_corners = rng.integers(3, size=size - len(first), dtype=np.uint8)
+                if len(first):
+                    random_corners = np.concatenate([first, random_corners])
+                    first = first[:0]
+
+                points = linear_recurrence(point, corners[random_corners], 1 / 2)
+                colors = color_gradient(random_corners, rgb, start=color)
+                point, color = points[-1].copy(), colors[-1].copy()
+
+            yield points.astype(self.dtype, copy=False), colors.astype(
+                self.dtype, copy=False
+            )
+
+    def plot(self, coloring=None, resolution=None):
+        """Plots the triangle.
 
-        if self.iteration == "black":
-            plt.scatter(*zip(*self.points[5:]), s=0.1, color="black")
+        Plots the points with the given coloring, which must have been
+        computed by the last iteration.
 
+        Parameters
+        ----------
+        coloring : String, optional
+            "black", "color" for one color per corner, or "gradient" for the
+            RGB color gradient, by default the iteration parameter
+        resolution : int, optional
+            Width in pixels of a density image to draw instead of a scatter
+            plot, by default only used for large numbers of points
+        """
+        if coloring is None:
+            coloring = self.iteration
+
+        if coloring == "color":
+            if self.corner_list is None:
+                raise ValueError("iterate with corners=True to plot corner colors")
+            values = CORNER_COLORS[self.corner_list[5:]]
+        elif coloring == "gradient":
+            if self.gradient is None:
+                raise ValueError("iterate with gradient=True to plot the gradient")
+            values = self.gradient[5:]
+        elif coloring == "black":
+            values = None
+        else:
+            raise ValueError('coloring must be "black", "color" or "gradient"')
+
+        corners = np.array(self.corners, dtype=float)
+        extent = (0.0, 1.0, 0.0, corners[2, 1])
+
+        with stage("Triangle.plot", len(self.points) - 5):
+            plot_points(
+                self.points[5:], values, s=0.1, extent=extent, resolution=resolution
+            )
+
+        plt = pyplot()
         plt.axis("equal")
         plt.axis("off")
         plt.show()
@@ -203,9 +285,7 @@ class Triangle:
 
 if __name__ == "__main__":
     figure = Triangle()
-    figure.iterate(10000)
-    figure.plot()
-    figure.iterate_color(10000)
-    figure.plot()
-    figure.iterate_gradient(10000)
-    figure.plot()
+    figure.iterate(10000, corners=True, gradient=True)
+    figure.plot("black")
+    figure.plot("color")
+    figure.plot("gradient")
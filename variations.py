@@ -1,19 +1,27 @@
+from functools import cached_property
+
 import numpy as np
-import matplotlib.pyplot as plt
-from chaos_game import ChaosGame
-from fern import Fern
+from profiling import stage
+from raster import plot_points, pyplot
+
+# Holds every combination of variations of points between -1 and 1, which
+# stay within a distance of sqrt(2) from the origin
+EXTENT = (-1.5, 1.5, -1.5, 1.5)
 
 
 class Variations:
-    """Transforms a set of coordinates using a fractal flame algorithm."""
+    """Transforms a set of coordinates using a fractal flame algorithm.
+
+    The polar coordinates r, theta and phi are only computed when a variation
+    needs them, and each variation is only computed once. Later calls reuse
+    the cached result, which is read-only.
+    """
 
     def __init__(self, x, y, colors="black"):
         self.colors = colors
         self.x = x
         self.y = y
-        self.r = np.sqrt(np.power(x, 2) + np.power(y, 2))
-        self.theta = np.arctan2(x, y)
-        self.phi = np.arctan2(y, x)
+        self._cache = {}
         self.collection = {
             "linear": self.linear,
             "swirl": self.swirl,
@@ -21,6 +29,22 @@ class Variations:
             "disc": self.disc,
         }
 
+    @cached_property
+    def r(self):
+        return np.hypot(self.x, self.y)
+
+    @cached_property
+    def r2(self):
+        return np.square(self.r)
+
+    @cached_property
+    def theta(self):
+        return np.arctan2(self.x, self.y)
+
+    @cached_property
+    def phi(self):
+        return np.arctan2(self.y, self.x)
+
     def __call__(self, coefficients, variations):
         """Returns coordinates transformed by a linear combination of variations.
 
@@ -42,53 +66,247 @@ class Variations:
         """
 
         coefficients = coefficients / np.sum(coefficients)
-        u_temp = np.zeros(shape=(self.x.size))
-        v_temp = np.zeros(shape=(self.y.size))
+        evaluated = [self._evaluate(variation) for variation in variations]
 
-        for i, coef in enumerate(coefficients):
-            self.collection[variations[i]]()
+        with stage("Variations.blend", np.size(self.x)):
+            u_temp = np.zeros(shape=(np.size(self.x)))
+            v_temp = np.zeros(shape=(np.size(self.y)))
+            scaled = np.empty(shape=(np.size(self.x)))
 
-            u_temp = u_temp + (coef * self.u)
-            v_temp = v_temp + (coef * self.v)
+            for (u, v), coef in zip(evaluated, coefficients):
+                u_temp += np.multiply(u, coef, out=scaled)
+                v_temp += np.multiply(v, coef, out=scaled)
 
         self.u = u_temp
         self.v = v_temp
 
         return u_temp, v_temp
 
+    def _stack(self, coefficients, variations):
+        """Returns normalized coefficient rows and the stacked variations.
+
+        Parameters
+        ----------
+        coefficients : array_like (m, k)
+            One set of weights per row, for the k variations
+        variations : List of str
+            Names of the k variations
+
+        Returns
+        -------
+        weights : ndarray (m, k)
+            The coefficient rows, each normalized to sum to one
+        u, v : ndarray (k, N)
+            Coordinates transformed by each of the variations
+        """
+        weights = np.atleast_2d(np.asarray(coefficients, dtype=float))
+        if weights.shape[1] != len(variations):
+            raise ValueError("there must be one coefficient for each variation")
+        weights = weights / np.sum(weights, axis=1, keepdims=True)
+
+        evaluated = [self._evaluate(variation) for variation in variations]
+        u = np.stack([u for u, _ in evaluated])
+        v = np.stack([v for _, v in evaluated])
+
+        return weights, u, v
+
+    def sweep(self, coefficients, variations):
+        """Returns coordinates transformed by many linear combinations at once.
+
+        Every variation is computed once, and all the combinations are then
+        given by a single matrix product.
+
+        Parameters
+        ----------
+        coefficients : array_like (m, k)
+            One set of weights per row, for the k variations
+        variations : List of str
+            Names of the k variations
+
+        Returns
+        -------
+        u, v : ndarray (m, N)
+            Transformed coordinates, one row per set of weights
+        """
+        weights, u, v = self._stack(coefficients, variations)
+
+        with stage("Variations.sweep", weights.shape[0] * u.shape[1]):
+            return weights @ u, weights @ v
+
+    def iter_sweep(self, coefficients, variations):
+        """Yields coordinates transformed by one linear combination at a time.
+
+        Works like sweep, but only keeps one combination in memory, and sets
+        u and v so that each combination can be plotted as it is yielded.
+
+        Parameters
+        ----------
+        coefficients : array_like (m, k)
+            One set of weights per row, for the k variations
+        variations : List of str
+            Names of the k variations
+
+        Yields
+        ------
+        u, v : ndarray (N, )
+            Transformed coordinates
+        """
+        weights, u, v = self._stack(coefficients, variations)
+
+        for row in weights:
+            self.u = row @ u
+            self.v = row @ v
+
+            yield self.u, self.v
+
+    def _evaluate(self, variation):
+        """Returns the cached coordinates of a variation, computing them once.
+
+        Parameters
+        ----------
+        variation : str
+            Name of the variation
+
+        Returns
+        -------
+        u, v : ndarray
+            Transformed coordinates
+        """
+        if variation not in self._cache:
+            if variation not in self.collection:
+                raise ValueError(f"unknown variation {variation!r}")
+
+            with stage("Variations." + variation, np.size(self.x)):
+                u, v = getattr(self, "_" + variation)()
+
+            # Read-only views, so the input arrays linear returns stay writeable
+            u, v = np.asarray(u).view(), np.asarray(v).view()
+            u.flags.writeable = v.flags.writeable = False
+
+            self._cache[variation] = (u, v)
+
+        return self._cache[variation]
+
     def linear(self):
-        self.u = self.x
-        self.v = self.y
+        self.u, self.v = self._evaluate("linear")
 
     def handkerchief(self):
-        self.u = self.r * np.sin(self.theta + self.r)
-        self.v = self.r * np.cos(self.theta - self.r)
+        self.u, self.v = self._evaluate("handkerchief")
 
     def swirl(self):
-        self.u = self.x * np.sin(np.power(self.r, 2)) - self.y * np.cos(
-            np.power(self.r, 2)
-        )
-        self.v = self.x * np.cos(np.power(self.r, 2)) + self.y * np.sin(
-            np.power(self.r, 2)
-        )
+        self.u, self.v = self._evaluate("swirl")
 
     def disc(self):
-        self.u = (self.theta / np.pi) * np.sin(np.pi * self.r)
-        self.v = (self.theta / np.pi) * np.cos(np.pi * self.r)
+        self.u, self.v = self._evaluate("disc")
+
+    def _linear(self):
+        return self.x, self.y
+
+    def _handkerchief(self):
+        # u = r * sin(theta + r), v = r * cos(theta - r)
+        u = np.add(self.theta, self.r)
+        np.sin(u, out=u)
+        u *= self.r
+
+        v = np.subtract(self.theta, self.r)
+        np.cos(v, out=v)
+        v *= self.r
+
+        return u, v
 
-    def plot(self, cmap):
+    def _swirl(self):
+        # u = x * sin(r^2) - y * cos(r^2), v = x * cos(r^2) + y * sin(r^2)
+        sin = np.sin(self.r2)
+        cos = np.cos(self.r2)
+
+        u = np.multiply(self.x, sin)
+        v = np.multiply(self.x, cos)
+        u -= np.multiply(self.y, cos, out=cos)
+        v += np.multiply(self.y, sin, out=sin)
+
+        return u, v
+
+    def _disc(self):
+        # u = theta / pi * sin(pi * r), v = theta / pi * cos(pi * r)
+        u = np.multiply(self.r, np.pi)
+        v = np.cos(u)
+        np.sin(u, out=u)
+
+        for array in (u, v):
+            array *= self.theta
+            array /= np.pi
+
+        return u, v
+
+    def plot(self, cmap, resolution=None):
         """Generates a plot of the transformed coordinates.
 
         Parameters
         ----------
         cmap : str
             The color specification
+        resolution : int, optional
+            Width in pixels of a density image to draw instead of a scatter
+            plot, by default only used for large numbers of points
         """
-        plt.scatter(self.u, -self.v, c=self.colors, cmap=cmap, s=0.1)
-        plt.axis("off")
+        if isinstance(self.colors, str):
+            values, color = None, self.colors
+        else:
+            values, color = self.colors, "black"
+
+        with stage("Variations.plot", np.size(self.u)):
+            plot_points(
+                np.column_stack([self.u, -self.v]),
+                values,
+                s=0.1,
+                color=color,
+                cmap=cmap,
+                resolution=resolution,
+            )
+        pyplot().axis("off")
+
+
+def transform_chunks(chunks, extent, coefficients, variations):
+    """Transforms blocks of points by a linear combination of variations.
+
+    The variations act on each point alone, so blocks of points, such as
+    the ones yielded by iter_chunks, can be transformed one at a time. The
+    points are scaled from the extent to between -1 and 1, and y is flipped
+    while transforming, as in the plots of Variations.
+
+    Parameters
+    ----------
+    chunks : iterable of (points, values)
+        Blocks of points (m, 2) and their color values
+    extent : tuple of float
+        The area of the points, as (xmin, xmax, ymin, ymax)
+    coefficients : List of float
+        The weight given to each variation
+    variations : List of str
+        Names of the variations
+
+    Yields
+    ------
+    points : ndarray (m, 2)
+        Transformed points
+    values : ndarray (m, )
+        The color values of the points
+    """
+    xmin, xmax, ymin, ymax = extent
+
+    for points, values in chunks:
+        x = 2 * (points[:, 0] - xmin) / (xmax - xmin) - 1
+        y = 2 * (points[:, 1] - ymin) / (ymax - ymin) - 1
+        u, v = Variations(x, -y)(coefficients, variations)
+
+        yield np.column_stack([u, -v]), values
 
 
 if __name__ == "__main__":
+    from chaos_game import ChaosGame
+    from fern import Fern
+
+    plt = pyplot()
 
     def plot_grid():
         plt.plot([-1, 1, 1, -1, -1], [-1, -1, 1, 1, -1], color="grey")
@@ -167,9 +385,7 @@ if __name__ == "__main__":
         plt.show()
 
     def linear_combinations_fern():
-        random_coefficients = []
-        for i in range(4):
-            random_coefficients.append(np.random.random())
+        random_coefficients = np.random.default_rng().random(4)
 
         fern = Fern()
         fern.iterate(50000)
@@ -187,13 +403,12 @@ if __name__ == "__main__":
 
         plt.figure(10, figsize=(9, 9))
 
-        for i, variation in enumerate(random_coefficients):
+        coefficients = [[c, 1 - c] for c in random_coefficients]
+        sweep = fern_vars.iter_sweep(coefficients, ["swirl", "linear"])
+
+        for i, _ in enumerate(sweep):
             plt.subplot(221 + i)
             plot_grid()
-            fern_vars(
-                [random_coefficients[i], 1 - random_coefficients[i]],
-                ["swirl", "linear"],
-            )
             fern_vars.plot("jet")
             plt.title(random_coefficients[i])
 
@@ -201,9 +416,7 @@ if __name__ == "__main__":
         plt.close()
 
     def linear_combinations_ngon():
-        random_coefficients = []
-        for i in range(4):
-            random_coefficients.append(np.random.random())
+        random_coefficients = np.random.default_rng().random(4)
 
         triangle = ChaosGame(4, 1 / 3)
         triangle.iterate(10000)
@@ -213,13 +426,12 @@ if __name__ == "__main__":
 
         plt.figure(10, figsize=(9, 9))
 
-        for i, variation in enumerate(variations):
+        coefficients = [[c, 1 - c] for c in random_coefficients]
+        sweep = tri_variations.iter_sweep(coefficients, ["handkerchief", "disc"])
+
+        for i, _ in enumerate(sweep):
             plt.subplot(221 + i)
             plot_grid()
-            tri_variations(
-                [random_coefficients[i], 1 - random_coefficients[i]],
-                ["handkerchief", "disc"],
-            )
             tri_variations.plot("jet")
             plt.title(random_coefficients[i])
 